@@ -1,22 +1,72 @@
+import argparse
+import copy
+import os
+import sys
+import time
 import pygame
 import random
-import math
-from enum import Enum
+from collections import namedtuple
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
 
-# Screen setup with auto-scaling
-display_info = pygame.display.Info()
-WIDTH = display_info.current_w
-HEIGHT = display_info.current_h
-SCALE_FACTOR = min(WIDTH/800, HEIGHT/600)
-BASE_UNIT = int(40 * SCALE_FACTOR)
-LANE_WIDTH = WIDTH // 3
+from autopilot import PILOTS, make_pilot
+from bullets import BulletPool
+from content import ContentWatcher, load_content
+from ecs import (COLLIDER, HEALTH, LIFETIME, POSITION, PREVIOUS, RENDERABLE,
+                 VELOCITY, Archetype, Component, World, expire, integrate,
+                 remember)
+from hud import TextCache
+from inputs import IDLE_CONTROLS, RESET, Controls, InputRecorder, InputReplay
+from lifecycle import Lifecycle
+from movement import MovementPatterns
+from particles import ParticlePool
+from persistence import SaveService
+from pipeline import RenderPipeline
+from profiler import FrameProfiler
+from rewind import RewindBuffer, load_state, save_state
+from spatial import BROAD_PHASES, make_broad_phase, rects_overlap
+from spectator import SpectatorServer
+from sprites import SpriteCache
+from starfield import Starfield
 
 # Game constants
 FPS = 60
-PIXEL_SIZE = max(2, int(4 * SCALE_FACTOR))  # Size for pixelated effects
+# The simulation always advances in fixed ticks of 1/FPS seconds; rendering
+# runs at its own rate and interpolates between the last two ticks
+TICK = 1 / FPS
+# Longest real-time gap the simulation catches up on (avoids a spiral of
+# death after a stall)
+MAX_FRAME_TIME = 0.25
+# Frame cap for the static pause and game-over screens
+IDLE_FPS = 15
+# Ticks stepped back per tick while rewind is held
+REWIND_SPEED = 2
+
+def configure_resolution(width, height):
+    # Every size in the game derives from the logical resolution
+    global WIDTH, HEIGHT, SCALE_FACTOR, BASE_UNIT, LANE_WIDTH, PIXEL_SIZE
+    WIDTH = width
+    HEIGHT = height
+    SCALE_FACTOR = min(WIDTH/800, HEIGHT/600)
+    BASE_UNIT = int(40 * SCALE_FACTOR)
+    LANE_WIDTH = WIDTH // 3
+    PIXEL_SIZE = max(2, int(4 * SCALE_FACTOR))  # Size for pixelated effects
+
+# Logical resolution until a window is opened, and for headless runs, which
+# never open one (the size SDL's dummy driver reports)
+HEADLESS_RESOLUTION = (1024, 768)
+configure_resolution(*HEADLESS_RESOLUTION)
+
+def init_display(fit_screen=True):
+    # Only the display and font modules: pygame.init() would also start
+    # audio and joystick support, which the game never uses and which are
+    # the slowest to come up. fit_screen sizes the game to the monitor;
+    # otherwise the configure_resolution() size is kept.
+    pygame.display.init()
+    pygame.font.init()
+    if fit_screen:
+        display_info = pygame.display.Info()
+        configure_resolution(display_info.current_w, display_info.current_h)
 
 # Colors (8-bit palette)
 COLORS = {
@@ -30,80 +80,104 @@ COLORS = {
     'cyan': (0, 236, 236),
 }
 
-class ParticleEffect:
-    def __init__(self, x, y, color, particle_count=8):
-        self.particles = []
-        for _ in range(particle_count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(2, 5)
-            self.particles.append({
-                'x': x,
-                'y': y,
-                'dx': math.cos(angle) * speed,
-                'dy': math.sin(angle) * speed,
-                'life': random.randint(10, 20),
-                'color': color
-            })
+# Starfield parallax layers: (star count, min speed, max speed)
+STAR_LAYERS = [(50, 0.5, 2.0)]
 
-    def update(self):
-        for particle in self.particles[:]:
-            particle['x'] += particle['dx']
-            particle['y'] += particle['dy']
-            particle['life'] -= 1
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
-
-    def draw(self, screen):
-        for particle in self.particles:
-            x = int(particle['x'])
-            y = int(particle['y'])
-            pygame.draw.rect(screen, particle['color'], 
-                           (x, y, PIXEL_SIZE, PIXEL_SIZE))
-
-class PowerUpType(Enum):
-    HEALTH = 1
-    WEAPON = 2
-    SHIELD = 3
-    SPEED = 4
-
-class PowerUp:
-    def __init__(self, x, y, power_type):
-        self.width = BASE_UNIT//2
-        self.height = BASE_UNIT//2
-        self.x = x
-        self.y = y
-        self.type = power_type
-        self.speed = int(3 * SCALE_FACTOR)
-        self.pulse = 0
-        self.pulse_dir = 1
-        # Definir el color basado en el tipo de powerup
-        self.color = {
-            PowerUpType.HEALTH: COLORS['red'],
-            PowerUpType.WEAPON: COLORS['yellow'],
-            PowerUpType.SHIELD: COLORS['cyan'],
-            PowerUpType.SPEED: COLORS['green']
-        }[power_type]
+# Enemies, power-ups, weapon patterns and the wave curve
+CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "content.json")
+
+# Save file, and the plain-text high score file it replaces
+SAVE_PATH = "savegame.json"
+LEGACY_HIGH_SCORE_PATH = "highscore.txt"
+
+# Permanent upgrades kept in the save as {name: level}; there is no shop,
+# they are set by editing the save
+UPGRADES = ("Health", "Damage", "Split Shot")
+
+# Most enemies/power-ups alive at once; further spawns wait for room
+ENTITY_CAPS = {'enemies': 400, 'powerups': 50}
+
+# Everything draw() reads from the game for one frame. Pipelined rendering
+# captures it with copied entity arrays and draws it on another thread
+Frame = namedtuple('Frame', 'player enemies powerups effects starfield '
+                            'score high_score wave alpha created')
+
+# Transparent color for cached sprites (not used by the palette)
+SPRITE_COLORKEY = (255, 0, 255)
+
+# Oscillating size offset that makes power-ups pulse
+PULSE = Component('pulse', pulse=np.float64, pulse_dir=np.float64)
+
+class PowerUp(Archetype):
+    def __init__(self, content):
+        super().__init__((POSITION, VELOCITY, COLLIDER, RENDERABLE, PULSE,
+                          PREVIOUS))
+        self.use_content(content)
+
+    def use_content(self, content):
+        self.colors = content.powerup_color
+        self.fall_speed = content.powerup_speed
+        self.size = content.powerup_size
+
+    def spawn(self, x, y, kind):
+        row, _ = self.allocate(1)
+        self.x[row] = self.prev_x[row] = x
+        self.y[row] = self.prev_y[row] = y
+        self.vx[row] = 0
+        self.vy[row] = self.fall_speed
+        self.width[row] = self.size
+        self.height[row] = self.size
+        self.sprite[row] = kind
+        self.pulse[row] = 0
+        self.pulse_dir[row] = 1
+        return row
 
     def update(self):
-        self.y += self.speed
-        # Pulsing effect
-        self.pulse += 0.1 * self.pulse_dir
-        if abs(self.pulse) >= 1:
-            self.pulse_dir *= -1
-
-    def draw(self, screen):
-        size_mod = int(4 * self.pulse)
-        pygame.draw.rect(screen, self.color, 
-                        (self.x - size_mod//2, 
-                         self.y - size_mod//2,
-                         self.width + size_mod, 
-                         self.height + size_mod))
+        # Pulsing effect (movement is handled by ecs.integrate)
+        n = self.count
+        if not n:
+            return
+        pulse = self.pulse[:n]
+        pulse_dir = self.pulse_dir[:n]
+        pulse += 0.1 * pulse_dir
+        pulse_dir[np.abs(pulse) >= 1] *= -1
+
+    @staticmethod
+    def render_sprite(color, width, height):
+        surface = pygame.Surface((width, height))
+        surface.fill(color)
+        return surface
+
+    def draw(self, screen, cache, rects=None, alpha=1.0):
+        # One cached surface per pulse step, blitted at the pulsed position
+        n = self.count
+        if not n:
+            return
+        size_mod = (4 * self.pulse[:n]).astype(np.int32)
+        width = (self.width[:n] + size_mod).tolist()
+        height = (self.height[:n] + size_mod).tolist()
+        x, y = self.positions(alpha)
+        x = (x - size_mod//2).tolist()
+        y = (y - size_mod//2).tolist()
+        blits = []
+        for kind, w, h, px, py in zip(self.sprite[:n].tolist(), width, height, x, y):
+            color = self.colors[kind]
+            surface = cache.get(('powerup', color, w, h),
+                                self.render_sprite, color, w, h)
+            blits.append((surface, (px, py)))
+        drawn = screen.blits(blits, doreturn=rects is not None)
+        if rects is not None:
+            rects.extend(drawn)
+
 class Player:
-    def __init__(self):
+    def __init__(self, content, effects, bullets):
         self.width = BASE_UNIT
         self.height = BASE_UNIT
         self.x = WIDTH//2 - self.width//2
         self.y = HEIGHT - int(100 * SCALE_FACTOR)
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.base_speed = int(6 * SCALE_FACTOR)
         self.speed = self.base_speed
         self.health = 100
@@ -114,12 +188,25 @@ class Player:
         self.score = 0
         self.currency = 0
         self.weapon_level = 1
-        self.bullets = []
+        self.bullets = bullets
         self.shoot_timer = 0
         self.shoot_delay = 15
-        self.effects = []
+        self.effects = effects
         self.invulnerable = 0
         self.speed_boost_timer = 0
+        self.use_content(content)
+
+    def use_content(self, content):
+        self.patterns = content.bullet_patterns
+        self.max_weapon_level = content.max_weapon_level
+        self.weapon_level = min(self.weapon_level, self.max_weapon_level)
+
+    def apply_upgrades(self, upgrades):
+        self.max_health += 20 * upgrades.get("Health", 0)
+        self.health = self.max_health
+        self.damage += upgrades.get("Damage", 0)
+        self.weapon_level = min(self.max_weapon_level,
+                                self.weapon_level + upgrades.get("Split Shot", 0))
 
     def update(self):
         # Update shooting cooldown
@@ -136,514 +223,1050 @@ class Player:
         if self.invulnerable > 0:
             self.invulnerable -= 1
 
-        # Update effects
-        for effect in self.effects[:]:
-            effect.update()
-            if not effect.particles:
-                self.effects.remove(effect)
-
-        # Update bullets
-        for bullet in self.bullets[:]:
-            bullet['y'] -= bullet['speed']
-            if bullet['y'] < -10:
-                self.bullets.remove(bullet)
-
     def shoot(self):
         if self.shoot_timer <= 0:
-            bullet_patterns = {
-                1: [(0, 0)],
-                2: [(-10, 0), (10, 0)],
-                3: [(-15, 0), (0, -5), (15, 0)],
-                4: [(-20, 0), (-7, -3), (7, -3), (20, 0)],
-                5: [(-20, 0), (-10, -3), (0, -5), (10, -3), (20, 0)]
-            }
-            
-            pattern = bullet_patterns[min(self.weapon_level, 5)]
-            for offset_x, offset_y in pattern:
-                self.bullets.append({
-                    'x': self.x + self.width//2 + offset_x,
-                    'y': self.y + offset_y,
-                    'width': int(4 * SCALE_FACTOR),
-                    'height': int(8 * SCALE_FACTOR),
-                    'speed': int(10 * SCALE_FACTOR),
-                    'damage': self.damage
-                })
-            
+            pattern = self.patterns[self.weapon_level]
+            self.bullets.fire(self.x + self.width//2, self.y, pattern,
+                              self.damage)
+
             self.shoot_timer = self.shoot_delay
 
-    def draw(self, screen):
+    def draw(self, screen, rects=None, alpha=1.0):
+        x, y = self.x, self.y
+        if alpha < 1.0:
+            x = self.prev_x + (x - self.prev_x) * alpha
+            y = self.prev_y + (y - self.prev_y) * alpha
+
         # Draw player ship (8-bit style)
         color = COLORS['white'] if self.invulnerable % 4 < 2 else COLORS['blue']
         
         # Ship body
         pygame.draw.rect(screen, color, 
-                        (self.x, self.y, self.width, self.height))
+                        (x, y, self.width, self.height))
         
         # Ship details
         detail_color = COLORS['cyan']
         pygame.draw.rect(screen, detail_color,
-                        (self.x + self.width//4, 
-                         self.y + self.height//4,
+                        (x + self.width//4, 
+                         y + self.height//4,
                          self.width//2, 
                          self.height//2))
 
         # Draw bullets
-        for bullet in self.bullets:
-            pygame.draw.rect(screen, COLORS['yellow'],
-                           (bullet['x'], bullet['y'], 
-                            bullet['width'], bullet['height']))
-
-        # Draw effects
-        for effect in self.effects:
-            effect.draw(screen)
+        self.bullets.draw(screen, COLORS['yellow'], rects, alpha)
 
         # Draw health bar
         bar_width = self.width
         bar_height = int(6 * SCALE_FACTOR)
         pygame.draw.rect(screen, COLORS['red'],
-                        (self.x, self.y - bar_height*2,
+                        (x, y - bar_height*2,
                          bar_width, bar_height))
         pygame.draw.rect(screen, COLORS['green'],
-                        (self.x, self.y - bar_height*2,
+                        (x, y - bar_height*2,
                          bar_width * (self.health/self.max_health),
                          bar_height))
 
         # Draw shield bar if has shield
         if self.shield > 0:
             pygame.draw.rect(screen, COLORS['blue'],
-                           (self.x, self.y - bar_height*3,
+                           (x, y - bar_height*3,
                             bar_width * (self.shield/self.max_shield),
                             bar_height))
 
-class Enemy:
-    TYPES = {
-        'basic': {
-            'health': 2,
-            'speed': 2,
-            'size': 1,
-            'color': COLORS['red'],
-            'points': 10,
-            'shape': 'rect'
-        },
-        'fast': {
-            'health': 1,
-            'speed': 5,
-            'size': 0.8,
-            'color': COLORS['yellow'],
-            'points': 15,
-            'shape': 'triangle'
-        },
-        'tank': {
-            'health': 5,
-            'speed': 2,
-            'size': 1.2,
-            'color': COLORS['purple'],
-            'points': 20,
-            'shape': 'diamond'
-        },
-        'boss': {
-            'health': 20,
-            'speed': 1,
-            'size': 2,
-            'color': COLORS['cyan'],
-            'points': 50,
-            'shape': 'circle'
-        }
-    }
-
-    def __init__(self, enemy_type):
-        specs = self.TYPES[enemy_type]
-        self.type = enemy_type
-        base_size = int(30 * SCALE_FACTOR * specs['size'])
-        self.width = base_size
-        self.height = base_size
-        self.x = random.randint(0, WIDTH - self.width)
-        self.y = -self.height
-        self.health = specs['health']
-        self.max_health = specs['health']
-        self.speed = int(specs['speed'] * SCALE_FACTOR)
-        self.color = specs['color']
-        self.points = specs['points']
-        self.shape = specs['shape']
-        self.movement_pattern = random.choice(['straight', 'sine', 'zigzag'])
-        self.time = 0
+        if rects is not None:
+            # Ship plus both bars, padded for fractional positions
+            rects.append(pygame.Rect(x - 1, y - bar_height*3 - 1,
+                                     self.width + 2,
+                                     self.height + bar_height*3 + 2))
+
+# Index into Enemy.PATTERNS
+MOVEMENT = Component('movement', pattern=np.int8)
+
+class Enemy(Archetype):
+    # Sideways movement: dx(age) = amplitude * wave(frequency * age)
+    PATTERNS = MovementPatterns()
+    PATTERNS.register('straight')
+    PATTERNS.register('sine', amplitude=2, frequency=0.1, wave='sin')
+    PATTERNS.register('zigzag', amplitude=3, frequency=0.1, wave='cos')
+
+    def __init__(self, content):
+        super().__init__((POSITION, VELOCITY, HEALTH, COLLIDER, RENDERABLE,
+                          LIFETIME, MOVEMENT, PREVIOUS))
+        self.use_content(content)
+
+    def use_content(self, content):
+        # Per-kind tables, already scaled to the current resolution
+        self.kinds = content.kinds
+        self.kind_size = content.size
+        self.kind_speed = content.speed
+        self.kind_health = content.health
+        self.kind_color = content.color
+        self.kind_shape = content.shape
+        # Kinds that show a health bar
+        self.armored = content.armored
+
+    def spawn(self, kind, rng=random):
+        base_size = self.kind_size[kind]
+        row, _ = self.allocate(1)
+        self.width[row] = base_size
+        self.height[row] = base_size
+        self.x[row] = self.prev_x[row] = rng.randint(0, WIDTH - base_size)
+        self.y[row] = self.prev_y[row] = -base_size
+        self.vx[row] = 0
+        self.vy[row] = self.kind_speed[kind]
+        self.health[row] = self.kind_health[kind]
+        self.max_health[row] = self.kind_health[kind]
+        self.sprite[row] = kind
+        self.pattern[row] = rng.randrange(len(self.PATTERNS.names))
+        self.age[row] = 0
+        self.life[row] = 0
+        return row
 
     def update(self):
-        self.time += 1
-        if self.movement_pattern == 'straight':
-            self.y += self.speed
-        elif self.movement_pattern == 'sine':
-            self.y += self.speed
-            self.x += math.sin(self.time * 0.1) * 2
-        elif self.movement_pattern == 'zigzag':
-            self.y += self.speed
-            self.x += math.cos(self.time * 0.1) * 3
-
-    def draw(self, screen):
-        if self.shape == 'rect':
-            pygame.draw.rect(screen, self.color,
-                           (self.x, self.y, self.width, self.height))
-        elif self.shape == 'triangle':
+        # Sideways movement patterns; ecs.integrate moves them down and
+        # ecs.expire advances age (the pattern clock) first
+        n = self.count
+        if n:
+            self.PATTERNS.advance(self.x[:n], self.pattern[:n], self.age[:n])
+
+    @staticmethod
+    def render_sprite(shape, color, width, height):
+        # One spare pixel so polygon/circle edges at width/height fit.
+        # A colorkey (RLE-accelerated) blits much faster than per-pixel alpha.
+        surface = pygame.Surface((width + 1, height + 1))
+        surface.fill(SPRITE_COLORKEY)
+        surface.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+        if shape == 'rect':
+            pygame.draw.rect(surface, color, (0, 0, width, height))
+        elif shape == 'triangle':
             points = [
-                (self.x + self.width//2, self.y),
-                (self.x, self.y + self.height),
-                (self.x + self.width, self.y + self.height)
+                (width//2, 0),
+                (0, height),
+                (width, height)
             ]
-            pygame.draw.polygon(screen, self.color, points)
-        elif self.shape == 'diamond':
+            pygame.draw.polygon(surface, color, points)
+        elif shape == 'diamond':
             points = [
-                (self.x + self.width//2, self.y),
-                (self.x + self.width, self.y + self.height//2),
-                (self.x + self.width//2, self.y + self.height),
-                (self.x, self.y + self.height//2)
+                (width//2, 0),
+                (width, height//2),
+                (width//2, height),
+                (0, height//2)
             ]
-            pygame.draw.polygon(screen, self.color, points)
-        elif self.shape == 'circle':
-            pygame.draw.circle(screen, self.color,
-                             (self.x + self.width//2,
-                              self.y + self.height//2),
-                             self.width//2)
+            pygame.draw.polygon(surface, color, points)
+        elif shape == 'circle':
+            pygame.draw.circle(surface, color,
+                               (width//2, height//2),
+                               width//2)
+        return surface
+
+    def draw(self, screen, cache, rects=None, alpha=1.0):
+        n = self.count
+        if not n:
+            return
+        surfaces = [cache.get(('enemy', shape, color, size, size),
+                              self.render_sprite, shape, color, size, size)
+                    for shape, color, size in zip(self.kind_shape,
+                                                  self.kind_color,
+                                                  self.kind_size)]
+        kinds = self.sprite[:n]
+        xs, ys = self.positions(alpha)
+        xs = xs.tolist()
+        ys = ys.tolist()
+        drawn = screen.blits([(surfaces[k], (x, y))
+                              for k, x, y in zip(kinds.tolist(), xs, ys)],
+                             doreturn=rects is not None)
+        if rects is not None:
+            rects.extend(drawn)
 
         # Health bar for bosses and tanks
-        if self.type in ['boss', 'tank']:
-            bar_width = self.width
-            bar_height = int(4 * SCALE_FACTOR)
-            pygame.draw.rect(screen, COLORS['red'],
-                           (self.x, self.y - bar_height - 2,
-                            bar_width, bar_height))
+        bar_height = int(4 * SCALE_FACTOR)
+        for row in np.flatnonzero(np.isin(kinds, self.armored)).tolist():
+            x = xs[row]
+            y = ys[row]
+            bar_width = int(self.width[row])
+            bar = pygame.draw.rect(screen, COLORS['red'],
+                                   (x, y - bar_height - 2,
+                                    bar_width, bar_height))
+            if rects is not None:
+                rects.append(bar)
             pygame.draw.rect(screen, COLORS['green'],
-                           (self.x, self.y - bar_height - 2,
-                            bar_width * (self.health/self.max_health),
+                           (x, y - bar_height - 2,
+                            bar_width * (self.health[row]/self.max_health[row]),
                             bar_height))
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Retro Space Shooter")
+    def __init__(self, headless=False, seed=None, dirty_rects=False,
+                 text_cache=True, scaled=False, star_layers=None,
+                 save_path=SAVE_PATH, balance=None, content_path=CONTENT_PATH,
+                 watch_content=False, broad_phase='grid', cull_margin=None,
+                 entity_caps=None, pipelined=False, pipeline_depth=2,
+                 spectator=None, rewind_seconds=0, upgrades=None):
+        self.headless = headless
+        # Nothing touches SDL until a window is needed, so headless games
+        # start without a display
+        if not headless:
+            init_display(fit_screen=not scaled)
+        # Enemy/power-up/wave data, compiled for this resolution; balance
+        # overrides the file's wave curve (balance.py sweeps it)
+        self.content, self.content_load_ms = load_content(
+            content_path, SCALE_FACTOR, BASE_UNIT, COLORS)
+        self.balance_override = balance
+        self.balance = balance or self.content.balance
+        self.content_watcher = (ContentWatcher(content_path, SCALE_FACTOR,
+                                               BASE_UNIT, COLORS)
+                                if watch_content else None)
+        # Dirty-rect rendering: update only the changed screen areas
+        self.dirty_rects = dirty_rects
+        self.previous_rects = None
+        self.redraw_fraction = 1.0
+        self.redraw_frames = 0
+        self.redraw_total = 0.0
+        # Every game draws its RNG seeds from the session seed, so a whole
+        # session is reproducible from that one number
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.seed_rng = random.Random(self.seed)
+        self.recorder = None
+        # Saves are written on a background thread; headless runs keep none
+        self.saves = (SaveService(save_path, LEGACY_HIGH_SCORE_PATH)
+                      if save_path else None)
+        # Permanent upgrades applied at every reset: the save's unless
+        # given (replays pass the ones they were recorded with)
+        if upgrades is None:
+            upgrades = self.saves.upgrades if self.saves else {}
+        unknown = sorted(set(upgrades) - set(UPGRADES))
+        if unknown:
+            print(f"warning: ignoring unknown upgrades {', '.join(unknown)} "
+                  f"(known: {', '.join(UPGRADES)})", file=sys.stderr)
+        self.upgrades = {name: level for name, level in upgrades.items()
+                         if name in UPGRADES}
+        if headless:
+            self.screen = None
+        else:
+            # scaled: render at the logical resolution and let SDL's renderer
+            # stretch it (nearest neighbour) to fill the monitor
+            flags = pygame.SCALED | pygame.FULLSCREEN if scaled else 0
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+            pygame.display.set_caption("Retro Space Shooter")
+            self.background = self.render_background()
+        self.starfield = Starfield(WIDTH, HEIGHT, star_layers or STAR_LAYERS)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, int(36 * SCALE_FACTOR))
-        
-        self.background_stars = [
-            {'x': random.randint(0, WIDTH),
-             'y': random.randint(0, HEIGHT),
-             'speed': random.uniform(0.5, 2)}
-            for _ in range(50)
-        ]
-        
+        # grid, sweep (sort-and-sweep along y) or brute; all give identical
+        # collisions, only the speed differs
+        self.broad_phase = make_broad_phase(broad_phase, BASE_UNIT * 2)
+        # Every entity kind lives in the world as packed component arrays;
+        # the particle pool is shared by the game and the player
+        self.world = World()
+        self.effects = self.world.add(
+            'particles', ParticlePool(capacity=8192, pixel_size=PIXEL_SIZE))
+        self.bullets = self.world.add(
+            'bullets', BulletPool(int(4 * SCALE_FACTOR),
+                                  int(8 * SCALE_FACTOR),
+                                  int(10 * SCALE_FACTOR)))
+        self.enemies = self.world.add('enemies', Enemy(self.content))
+        self.powerups = self.world.add('powerups', PowerUp(self.content))
+        # Enemies and power-ups are dropped once they are cull_margin pixels
+        # past the screen edge; bullets and particles have their own rules
+        # and are only counted
+        caps = ENTITY_CAPS if entity_caps is None else entity_caps
+        self.lifecycle = Lifecycle(
+            WIDTH, HEIGHT, BASE_UNIT * 2 if cull_margin is None else cull_margin)
+        self.lifecycle.track('enemies', self.enemies, caps.get('enemies'))
+        self.lifecycle.track('powerups', self.powerups, caps.get('powerups'))
+        self.lifecycle.track('bullets', self.bullets, cull=False)
+        self.lifecycle.track('particles', self.effects, cull=False)
+        self.sprites = SpriteCache()
+        self.profiler = FrameProfiler()
+        # pipelined: run() draws on a render thread with its own profiler
+        # (the overlay then shows the render thread's stages)
+        self.pipelined = pipelined
+        self.pipeline_depth = pipeline_depth
+        self.pipeline = None
+        self.pipeline_stats = None
+        self.render_profiler = self.profiler
+        # spectator: a started SpectatorServer that every tick is published to
+        self.spectator = spectator
+        # The last rewind_seconds of play, stepped back through while
+        # Backspace is held; F5/F9 quick-save and quick-load. Both are off
+        # while recording, since the replay could not follow them
+        self.rewind = (RewindBuffer(int(rewind_seconds * FPS))
+                       if rewind_seconds else None)
+        self.quick_save = None
+        self.font = (None if headless
+                     else pygame.font.Font(None, int(36 * SCALE_FACTOR)))
+        self.text = TextCache(self.font, enabled=text_cache)
+
         self.reset_game()
-        self.load_high_score()
+        self.starfield.scatter(self.fx_rng)
 
     def reset_game(self):
-        self.player = Player()
-        self.enemies = []
-        self.powerups = []
-        self.effects = []
+        # Separate streams: gameplay decisions vs. cosmetic particles/stars
+        game_seed = self.seed_rng.getrandbits(32)
+        self.rng = random.Random(game_seed)
+        self.fx_rng = np.random.default_rng(game_seed)
+        self.effects.rng = self.fx_rng
+        self.starfield.rng = self.fx_rng
+        self.world.clear()
+        self.player = Player(self.content, self.effects, self.bullets)
+        self.player.apply_upgrades(self.upgrades)
         self.wave = 1
+        self.wave_stats = [self.new_wave_stats(1)]
+        self.spawn_weights = self.content.spawn_table(self.wave, self.balance)
         self.wave_timer = 0
-        self.spawn_rate = 60
+        self.spawn_rate = self.balance.spawn_rate
         self.running = True
         self.paused = False
         self.game_over = False
         self.score = 0
+        self.load_high_score()
+        if self.rewind is not None:
+            self.rewind.clear()
+
+    def apply_content(self, content):
+        # Live entities store kind indices, so if the list of kinds changed
+        # they can't be carried over
+        if content.kinds != self.content.kinds:
+            self.enemies.clear()
+        if content.powerup_kinds != self.content.powerup_kinds:
+            self.powerups.clear()
+        self.content = content
+        self.balance = self.balance_override or content.balance
+        self.enemies.use_content(content)
+        self.powerups.use_content(content)
+        self.player.use_content(content)
+        self.spawn_weights = content.spawn_table(self.wave, self.balance)
 
     def load_high_score(self):
-        try:
-            with open("highscore.txt", "r") as f:
-                self.high_score = int(f.read())
-        except:
-            self.high_score = 0
+        self.high_score = self.saves.high_score if self.saves else 0
 
-    def save_high_score(self):
-        with open("highscore.txt", "w") as f:
-            f.write(str(max(self.high_score, self.score)))
+    def save_game(self):
+        # Only queues the write; the game loop never waits on the disk
+        if self.saves:
+            self.saves.record_game(self.score, self.wave, self.seed,
+                                   self.wave_stats)
+
+    @staticmethod
+    def new_wave_stats(wave):
+        return {'wave': wave, 'frames': 0, 'kills': 0, 'damage_taken': 0}
 
     def spawn_enemy(self):
         if self.wave_timer <= 0:
-            enemy_types = ['basic', 'fast', 'tank', 'boss']
-            weights = [0.5, 0.3, 0.15, 0.05]
-            
-            # Adjust weights based on wave
-            weights = [w * (1 + self.wave * 0.1) for w in weights]
-            
-            enemy_type = random.choices(enemy_types, weights=weights)[0]
-            self.enemies.append(Enemy(enemy_type))
-            self.wave_timer = max(20, self.spawn_rate - self.wave * 2)
+            balance = self.balance
+            # A spawn refused by the cap still waits out the interval, so
+            # the lifecycle counts it once rather than every tick until
+            # the cap frees up
+            if not self.lifecycle.full('enemies'):
+                kind = self.content.pick(self.spawn_weights, self.rng)
+                self.enemies.spawn(kind, self.rng)
+            self.wave_timer = max(balance.min_spawn_rate,
+                                  self.spawn_rate - self.wave * balance.spawn_rate_decay)
 
     def spawn_powerup(self, x, y):
-        if random.random() < 0.3:  # 30% chance to spawn powerup
-            power_type = random.choice(list(PowerUpType))
-            self.powerups.append(PowerUp(x, y, power_type))
+        content = self.content
+        if (self.rng.random() < content.powerup_chance
+                and not self.lifecycle.full('powerups')):
+            kind = self.rng.randrange(len(content.powerup_kinds))
+            self.powerups.spawn(x, y, kind)
 
     def handle_collisions(self):
+        player = self.player
+        bullets = self.bullets
+        enemies = self.enemies
+        powerups = self.powerups
+        broad_phase = self.broad_phase
+        content = self.content
+
         # Bullet-enemy collisions
-        for enemy in self.enemies[:]:
-            for bullet in self.player.bullets[:]:
-                if (bullet['y'] < enemy.y + enemy.height and
-                    bullet['y'] + bullet['height'] > enemy.y and
-                    bullet['x'] < enemy.x + enemy.width and
-                    bullet['x'] + bullet['width'] > enemy.x):
-                    
-                    enemy.health -= bullet['damage']
-                    if bullet in self.player.bullets:
-                        self.player.bullets.remove(bullet)
-                    
-                    # Spawn hit effect
-                    self.effects.append(
-                        ParticleEffect(
-                            bullet['x'], 
-                            bullet['y'], 
-                            COLORS['yellow']
-                        )
-                    )
-                    
-                    if enemy.health <= 0:
-                        self.score += enemy.points * self.wave
-                        self.spawn_powerup(enemy.x, enemy.y)
-                        self.effects.append(
-                            ParticleEffect(
-                                enemy.x + enemy.width//2,
-                                enemy.y + enemy.height//2,
-                                enemy.color,
-                                particle_count=12
-                            )
-                        )
-                        if enemy in self.enemies:
-                            self.enemies.remove(enemy)
-                    break
+        if bullets.count and enemies.count:
+            bullet_w = bullets.width
+            bullet_h = bullets.height
+            bullet_x = bullets.x[:bullets.count].tolist()
+            bullet_y = bullets.y[:bullets.count].tolist()
+            bullet_damage = bullets.damage[:bullets.count].tolist()
+            broad_phase.build([(x, y, bullet_w, bullet_h)
+                               for x, y in zip(bullet_x, bullet_y)])
+            n = enemies.count
+            health = enemies.health
+            spent = set()
+            destroyed = []
+            for row, x, y, w, h in zip(range(n), enemies.x[:n].tolist(),
+                                       enemies.y[:n].tolist(),
+                                       enemies.width[:n].tolist(),
+                                       enemies.height[:n].tolist()):
+                for index in broad_phase.query(x, y, w, h):
+                    if index in spent:
+                        continue
+                    if rects_overlap(bullet_x[index], bullet_y[index],
+                                     bullet_w, bullet_h, x, y, w, h):
+
+                        health[row] -= bullet_damage[index]
+                        spent.add(index)
+
+                        # Spawn hit effect
+                        self.effects.emit(bullet_x[index], bullet_y[index],
+                                          COLORS['yellow'])
+
+                        if health[row] <= 0:
+                            kind = enemies.sprite[row]
+                            self.score += content.points[kind] * self.wave
+                            self.spawn_powerup(x, y)
+                            self.effects.emit(x + w//2, y + h//2,
+                                              content.color[kind], particle_count=12)
+                            destroyed.append(row)
+                            self.wave_stats[-1]['kills'] += 1
+                        break
+            if spent:
+                bullets.remove(spent)
+            if destroyed:
+                enemies.remove(destroyed)
 
         # Player-enemy collisions
-        if self.player.invulnerable <= 0:
-            for enemy in self.enemies[:]:
-                if (self.player.y < enemy.y + enemy.height and
-                    self.player.y + self.player.height > enemy.y and
-                    self.player.x < enemy.x + enemy.width and
-                    self.player.x + self.player.width > enemy.x):
-                    
+        if player.invulnerable <= 0 and enemies.count:
+            n = enemies.count
+            enemy_rects = list(zip(enemies.x[:n].tolist(), enemies.y[:n].tolist(),
+                                   enemies.width[:n].tolist(),
+                                   enemies.height[:n].tolist()))
+            broad_phase.build(enemy_rects)
+            hits = []
+            for row in broad_phase.query(player.x, player.y,
+                                         player.width, player.height):
+                x, y, w, h = enemy_rects[row]
+                if rects_overlap(player.x, player.y, player.width, player.height,
+                                 x, y, w, h):
+
                     # Handle shield first if available
-                    if self.player.shield > 0:
-                        self.player.shield = max(0, self.player.shield - 20)
+                    if player.shield > 0:
+                        player.shield = max(0, player.shield - 20)
                     else:
-                        self.player.health -= 20
-                    
-                    self.effects.append(
-                        ParticleEffect(
-                            enemy.x + enemy.width//2,
-                            enemy.y + enemy.height//2,
-                            COLORS['red'],
-                            particle_count=15
-                        )
-                    )
-                    
-                    self.player.invulnerable = 60  # 1 second of invulnerability
-                    if enemy in self.enemies:
-                        self.enemies.remove(enemy)
+                        player.health -= 20
+                        self.wave_stats[-1]['damage_taken'] += 20
+
+                    self.effects.emit(x + w//2, y + h//2,
+                                      COLORS['red'], particle_count=15)
+
+                    player.invulnerable = 60  # 1 second of invulnerability
+                    hits.append(row)
+            if hits:
+                enemies.remove(hits)
 
         # Player-powerup collisions
-        for powerup in self.powerups[:]:
-            if (self.player.y < powerup.y + powerup.height and
-                self.player.y + self.player.height > powerup.y and
-                self.player.x < powerup.x + powerup.width and
-                self.player.x + self.player.width > powerup.x):
-                
-                if powerup.type == PowerUpType.HEALTH:
-                    self.player.health = min(self.player.max_health,
-                                           self.player.health + 30)
-                elif powerup.type == PowerUpType.WEAPON:
-                    self.player.weapon_level = min(5, self.player.weapon_level + 1)
-                elif powerup.type == PowerUpType.SHIELD:
-                    self.player.shield = min(self.player.max_shield,
-                                           self.player.shield + 30)
-                elif powerup.type == PowerUpType.SPEED:
-                    self.player.speed = self.player.base_speed * 1.5
-                    self.player.speed_boost_timer = 300  # 5 seconds
-                
-                self.effects.append(
-                    ParticleEffect(
-                        powerup.x + powerup.width//2,
-                        powerup.y + powerup.height//2,
-                        powerup.color,
-                        particle_count=10
-                    )
-                )
-                
-                if powerup in self.powerups:
-                    self.powerups.remove(powerup)
+        if not powerups.count:
+            return
+        n = powerups.count
+        powerup_rects = list(zip(powerups.x[:n].tolist(), powerups.y[:n].tolist(),
+                                 powerups.width[:n].tolist(),
+                                 powerups.height[:n].tolist()))
+        broad_phase.build(powerup_rects)
+        collected = []
+        for row in broad_phase.query(player.x, player.y,
+                                     player.width, player.height):
+            x, y, w, h = powerup_rects[row]
+            if rects_overlap(player.x, player.y, player.width, player.height,
+                             x, y, w, h):
+
+                kind = powerups.sprite[row]
+                effect, amount, duration = content.powerup_effect[kind]
+                if effect == 'heal':
+                    player.health = min(player.max_health,
+                                        player.health + amount)
+                elif effect == 'weapon':
+                    player.weapon_level = min(player.max_weapon_level,
+                                              player.weapon_level + amount)
+                elif effect == 'shield':
+                    player.shield = min(player.max_shield,
+                                        player.shield + amount)
+                elif effect == 'speed':
+                    player.speed = player.base_speed * amount
+                    player.speed_boost_timer = duration
+
+                self.effects.emit(x + w//2, y + h//2,
+                                  content.powerup_color[kind], particle_count=10)
+                collected.append(row)
+        if collected:
+            powerups.remove(collected)
 
     def update_background(self):
-        # Update star positions
-        for star in self.background_stars:
-            star['y'] += star['speed']
-            if star['y'] > HEIGHT:
-                star['y'] = 0
-                star['x'] = random.randint(0, WIDTH)
-
-    def draw_background(self):
-        # Draw stars
-        for star in self.background_stars:
-            size = 2 if star['speed'] > 1 else 1
-            pygame.draw.rect(self.screen, COLORS['white'],
-                           (int(star['x']), int(star['y']), size, size))
-        
-        # Draw dividing lines for lanes
+        self.starfield.update()
+
+    def render_background(self):
+        # Lane dividers never move, so they are drawn once and the frame is
+        # cleared by blitting this surface
+        background = pygame.Surface((WIDTH, HEIGHT))
+        background.fill(COLORS['black'])
         for i in range(1, 3):
             x = i * LANE_WIDTH
-            pygame.draw.line(self.screen, COLORS['blue'],
-                           (x, 0), (x, HEIGHT), 1)
+            pygame.draw.line(background, COLORS['blue'], (x, 0), (x, HEIGHT), 1)
+        return background.convert()
+
+    def draw_background(self, frame, rects=None):
+        frame.starfield.draw(self.screen, COLORS['white'], rects, frame.alpha)
 
-    def draw_hud(self):
+    def draw_hud(self, frame, rects=None):
         # Score
-        score_text = self.font.render(f"Score: {self.score}", True, COLORS['white'])
-        self.screen.blit(score_text, (10, 10))
+        score_text = self.text.render('score', f"Score: {frame.score}", COLORS['white'])
+        drawn = [self.screen.blit(score_text, (10, 10))]
         
         # High Score
-        high_score_text = self.font.render(f"High: {self.high_score}", True, COLORS['white'])
-        self.screen.blit(high_score_text, (10, 50))
+        high_score_text = self.text.render('high_score', f"High: {frame.high_score}", COLORS['white'])
+        drawn.append(self.screen.blit(high_score_text, (10, 50)))
         
         # Wave
-        wave_text = self.font.render(f"Wave {self.wave}", True, COLORS['white'])
+        wave_text = self.text.render('wave', f"Wave {frame.wave}", COLORS['white'])
         wave_rect = wave_text.get_rect(midtop=(WIDTH//2, 10))
-        self.screen.blit(wave_text, wave_rect)
+        drawn.append(self.screen.blit(wave_text, wave_rect))
         
         # Weapon Level
-        weapon_text = self.font.render(f"Weapon Lvl: {self.player.weapon_level}", True, COLORS['yellow'])
-        self.screen.blit(weapon_text, (WIDTH - 200, 10))
-        
-   
+        weapon_text = self.text.render('weapon', f"Weapon Lvl: {frame.player.weapon_level}", COLORS['yellow'])
+        drawn.append(self.screen.blit(weapon_text, (WIDTH - 200, 10)))
+
+        if rects is not None:
+            rects.extend(drawn)
+
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.paused = not self.paused
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                    if self.render_profiler is not self.profiler:
+                        self.render_profiler.toggle()
+                elif event.key == pygame.K_F5 and not self.recorder:
+                    self.quick_save = save_state(self)
+                elif (event.key == pygame.K_F9 and self.quick_save
+                      and not self.recorder and not self.game_over):
+                    load_state(self, self.quick_save)
+                    if self.rewind is not None:
+                        self.rewind.clear()
+                elif event.key == pygame.K_r and self.game_over:
+                    self.reset_game()
+                    if self.recorder:
+                        self.recorder.mark_reset()
+
+                # Solo permitir salir cuando el juego está pausado
+                if event.key == pygame.K_q and self.paused:  # Tecla 'Q' para salir solo cuando está pausado
+                    self.running = False  # Detiene el bucle del juego
+
+    def read_controls(self):
+        keys = pygame.key.get_pressed()
+        return Controls(
+            left=bool(keys[pygame.K_a] or keys[pygame.K_LEFT]),
+            right=bool(keys[pygame.K_d] or keys[pygame.K_RIGHT]),
+            mouse_down=bool(pygame.mouse.get_pressed()[0]),
+            mouse_x=pygame.mouse.get_pos()[0])
+
+    def update(self, controls):
+        # One fixed tick; remember where everything started for interpolation
+        remember(self.world)
+        self.player.prev_x = self.player.x
+        self.player.prev_y = self.player.y
+
+        # Movimiento del jugador
+        if controls.left:
+            self.player.x = max(0, self.player.x - self.player.speed)
+        if controls.right:
+            self.player.x = min(WIDTH - self.player.width,
+                                self.player.x + self.player.speed)
+
+        # Movimiento alternativo con el mouse
+        if controls.mouse_down:  # Botón izquierdo del mouse
+            target_x = controls.mouse_x - self.player.width // 2
+            if abs(target_x - self.player.x) > self.player.speed:
+                if target_x > self.player.x:
+                    self.player.x = min(self.player.x + self.player.speed, WIDTH - self.player.width)
+                else:
+                    self.player.x = max(self.player.x - self.player.speed, 0)
+
+        # Disparo automático
+        self.player.shoot()
+
+        # Actualizar los elementos del juego
+        profiler = self.profiler
+        self.player.update()
+        profiler.mark('player')
+        self.update_background()
+        profiler.mark('background')
+
+        # Systems: bulk movement and lifetimes for every entity kind, then
+        # the per-kind behaviour
+        integrate(self.world)
+        expire(self.world)
+        self.bullets.cull()
+        profiler.mark('movement')
+        self.enemies.update()
+        profiler.mark('enemies')
+        self.powerups.update()
+        profiler.mark('powerups')
+        self.lifecycle.cull()
+        profiler.mark('cull')
+
+        # Generar enemigos
+        self.wave_timer -= 1
+        self.spawn_enemy()
+        profiler.mark('spawn')
+
+        # Manejar colisiones
+        self.handle_collisions()
+        profiler.mark('collisions')
+
+        # Comprobar progresión de olas
+        self.wave_stats[-1]['frames'] += 1
+        balance = self.balance
+        if self.score >= self.wave * balance.wave_score:
+            self.wave += 1
+            self.spawn_rate = max(balance.min_spawn_rate,
+                                  self.spawn_rate - balance.spawn_rate_decay)
+            self.spawn_weights = self.content.spawn_table(self.wave, balance)
+            self.wave_stats.append(self.new_wave_stats(self.wave))
+
+        # Comprobar fin del juego
+        if self.player.health <= 0:
+            self.game_over = True
+
+        if self.spectator:
+            self.spectator.publish(self)
+            profiler.mark('spectate')
+
+    def capture(self, alpha=1.0, frozen=False):
+        # frozen copies the moving state, so the frame can be drawn while
+        # the simulation carries on; otherwise it refers to the live objects
+        player = self.player
+        enemies = self.enemies
+        powerups = self.powerups
+        effects = self.effects
+        starfield = self.starfield
+        if frozen:
+            player = copy.copy(player)
+            player.bullets = self.bullets.snapshot()
+            enemies = enemies.snapshot()
+            powerups = powerups.snapshot()
+            effects = effects.snapshot()
+            starfield = starfield.snapshot()
+        return Frame(player, enemies, powerups, effects, starfield,
+                     self.score, self.high_score, self.wave, alpha,
+                     time.perf_counter())
+
+    def draw(self, alpha=1.0):
+        self.render(self.capture(alpha))
+
+    def render(self, frame):
+        # In dirty-rect mode only last frame's rects are cleared, and every
+        # draw call reports the area it touched. frame.alpha places moving
+        # things between the previous and the current tick.
+        profiler = self.render_profiler
+        alpha = frame.alpha
+        collect = self.dirty_rects
+        rects = [] if collect else None
+        if collect and self.previous_rects is not None:
+            for rect in self.previous_rects:
+                self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.blit(self.background, (0, 0))
+        profiler.mark('draw_clear')
+        self.draw_background(frame, rects)
+        profiler.mark('draw_bg')
+
+        # Dibujar los elementos del juego
+        frame.player.draw(self.screen, rects, alpha)
+        profiler.mark('draw_player')
+        frame.enemies.draw(self.screen, self.sprites, rects, alpha)
+        profiler.mark('draw_enemies')
+        frame.powerups.draw(self.screen, self.sprites, rects, alpha)
+        profiler.mark('draw_powerups')
+        frame.effects.draw(self.screen, rects, alpha)
+        profiler.mark('draw_effects')
 
-    def run(self):
+        self.draw_hud(frame, rects)
+        profiler.mark('draw_hud')
+        if profiler.overlay:
+            drawn = profiler.draw(self.screen, self.text, COLORS['cyan'],
+                                  (10, int(100 * SCALE_FACTOR)))
+            if collect:
+                rects.extend(drawn)
+            profiler.mark('draw_profiler')
+        self.present(rects)
+        profiler.mark('present')
+
+    def present(self, rects=None):
+        # rects=None means the whole screen changed (e.g. an overlay)
+        if not self.dirty_rects:
+            pygame.display.flip()
+            return
+        if rects is None or self.previous_rects is None:
+            pygame.display.flip()
+            fraction = 1.0
+            # After a full-screen overlay the next frame repaints everything
+            self.previous_rects = rects
+        else:
+            screen_rect = self.screen.get_rect()
+            changed = self.previous_rects + rects
+            pygame.display.update(changed)
+            area = 0
+            for rect in changed:
+                clipped = rect.clip(screen_rect)
+                area += clipped.width * clipped.height
+            fraction = min(1.0, area / (WIDTH * HEIGHT))
+            self.previous_rects = rects
+        self.redraw_fraction = fraction
+        self.redraw_frames += 1
+        self.redraw_total += fraction
+
+    def simulate(self, max_frames, controller=None, recorder=None):
+        # Fixed-timestep simulation without rendering; one call = one game
+        frames = 0
+        profiler = self.profiler
+        while not self.game_over and frames < max_frames:
+            profiler.begin_frame()
+            controls = controller(self) if controller else IDLE_CONTROLS
+            if recorder:
+                recorder.record(controls)
+            self.update(controls)
+            profiler.end_frame()
+            frames += 1
+        return frames
+
+    def play_replay(self, replay, render=True):
+        # One recorded frame is exactly one update() call. Nothing is
+        # recorded after a game over, so input left over once this game has
+        # ended means the replay went out of sync; it is skipped up to the
+        # next reset rather than played into a dead game.
+        frames = 0
+        skipped = 0
+        for controls in replay:
+            if controls is RESET:
+                self.reset_game()
+                continue
+            if self.game_over:
+                skipped += 1
+                continue
+            self.update(controls)
+            frames += 1
+            if render:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return frames
+                self.draw()
+                self.clock.tick(FPS)
+        if skipped:
+            print(f"warning: replay out of sync, {skipped} frames of input "
+                  f"after a game over were skipped", file=sys.stderr)
+        return frames
+
+    def run(self, recorder=None, render_fps=FPS):
+        # render_fps caps the drawing rate (0 = uncapped); gameplay speed is
+        # set by TICK alone
+        self.recorder = recorder
+        rewind = self.rewind if not recorder else None
+        profiler = self.profiler
+        accumulator = 0.0
+        if self.pipelined:
+            self.start_pipeline()
+        self.clock.tick()
         while self.running:
-            current_time = pygame.time.get_ticks()
-            
-            # Event handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.paused = not self.paused
-                    elif event.key == pygame.K_r and self.game_over:
-                        self.reset_game()
-                    
-                    # Solo permitir salir cuando el juego está pausado
-                    if event.key == pygame.K_q and self.paused:  # Tecla 'Q' para salir solo cuando está pausado
-                        self.running = False  # Detiene el bucle del juego
-                        
+            profiler.begin_frame()
+            self.handle_events()
+            if self.content_watcher:
+                content = self.content_watcher.poll()
+                if content:
+                    self.apply_content(content)
+            profiler.mark('events')
+
             # Si el juego está pausado o ha terminado, dibuja la pantalla correspondiente
             if self.paused or self.game_over:
+                if self.pipeline:
+                    # The overlays are drawn from this thread
+                    self.pipeline.flush()
                 self.draw_pause_screen() if self.paused else self.draw_game_over_screen()
-                pygame.display.flip()
+                self.present()
+                # Nothing moves here, so don't spin the CPU redrawing it
+                self.clock.tick(IDLE_FPS)
+                accumulator = 0.0
                 continue
 
-            # Lógica del juego
-            keys = pygame.key.get_pressed()
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Movimiento del jugador
-            if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-                self.player.x = max(0, self.player.x - self.player.speed)
-            if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-                self.player.x = min(WIDTH - self.player.width,
-                                    self.player.x + self.player.speed)
-            
-            # Movimiento alternativo con el mouse
-            if pygame.mouse.get_pressed()[0]:  # Botón izquierdo del mouse
-                target_x = mouse_pos[0] - self.player.width // 2
-                if abs(target_x - self.player.x) > self.player.speed:
-                    if target_x > self.player.x:
-                        self.player.x = min(self.player.x + self.player.speed, WIDTH - self.player.width)
-                    else:
-                        self.player.x = max(self.player.x - self.player.speed, 0)
-            
-            # Disparo automático
-            self.player.shoot()
-            
-            # Actualizar los elementos del juego
-            self.player.update()
-            self.update_background()
-            
-            for enemy in self.enemies:
-                enemy.update()
-            for powerup in self.powerups:
-                powerup.update()
-            for effect in self.effects[:]:
-                effect.update()
-                if not effect.particles:
-                    self.effects.remove(effect)
-            
-            # Generar enemigos
-            self.wave_timer -= 1
-            self.spawn_enemy()
-            
-            # Manejar colisiones
-            self.handle_collisions()
-            
-            # Comprobar progresión de olas
-            if self.score >= self.wave * 1000:
-                self.wave += 1
-                self.spawn_rate = max(20, self.spawn_rate - 2)
-            
-            # Comprobar fin del juego
-            if self.player.health <= 0:
-                self.game_over = True
-                self.save_high_score()
+            accumulator += min(self.clock.tick(render_fps) / 1000, MAX_FRAME_TIME)
+            profiler.mark('wait')
+
+            # Lógica del juego: as many fixed ticks as real time has covered
+            while accumulator >= TICK:
+                accumulator -= TICK
+                if (rewind is not None
+                        and pygame.key.get_pressed()[pygame.K_BACKSPACE]):
+                    rewind.rewind(self, REWIND_SPEED)
+                    profiler.mark('rewind')
+                    continue
+                controls = self.read_controls()
+                if self.recorder:
+                    self.recorder.record(controls)
+                profiler.mark('input')
+                self.update(controls)
+                if rewind is not None:
+                    rewind.record(self)
+                    profiler.mark('rewind')
+                if self.game_over:
+                    break
+            if self.game_over:
+                self.save_game()
                 continue
-            
+
             # Dibujar
-            self.screen.fill(COLORS['black'])
-            self.draw_background()
-            
-            # Dibujar los elementos del juego
-            self.player.draw(self.screen)
-            for enemy in self.enemies:
-                enemy.draw(self.screen)
-            for powerup in self.powerups:
-                powerup.draw(self.screen)
-            for effect in self.effects:
-                effect.draw(self.screen)
-            
-            self.draw_hud()
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            if self.pipeline:
+                frame = self.capture(accumulator / TICK, frozen=True)
+                if not self.pipeline.submit(frame):
+                    self.stop_pipeline()
+                    self.draw(accumulator / TICK)
+                profiler.mark('submit')
+            else:
+                self.draw(accumulator / TICK)
+            profiler.end_frame()
 
+        self.stop_pipeline()
+        if self.recorder:
+            self.recorder.close()
+        profiler.close()
+        if self.saves:
+            self.saves.close()
         pygame.quit()
 
+    def start_pipeline(self):
+        self.render_profiler = FrameProfiler()
+        if self.profiler.overlay:
+            self.render_profiler.toggle()
+        self.pipeline = RenderPipeline(self.render_pipelined,
+                                       self.pipeline_depth)
+
+    def render_pipelined(self, frame):
+        # Runs on the render thread
+        profiler = self.render_profiler
+        profiler.begin_frame()
+        self.render(frame)
+        profiler.end_frame()
+
+    def stop_pipeline(self):
+        # Back to drawing on this thread: at exit, or as the fallback when
+        # the render thread has failed
+        if not self.pipeline:
+            return
+        self.pipeline.flush()
+        self.pipeline.close()
+        self.pipeline_stats = self.pipeline.stats()
+        if self.pipeline.error is not None:
+            # A frame may have been left half drawn; repaint everything
+            self.previous_rects = None
+        self.pipeline = None
+        self.render_profiler = self.profiler
+
     def draw_pause_screen(self):
-        s = pygame.Surface((WIDTH, HEIGHT))
-        s.set_alpha(128)
-        s.fill(COLORS['black'])
+        s = self.text.overlay((WIDTH, HEIGHT), COLORS['black'], 128)
         self.screen.blit(s, (0, 0))
         
-        pause_text = self.font.render("PAUSED", True, COLORS['white'])
+        pause_text = self.text.render('paused', "PAUSED", COLORS['white'])
         text_rect = pause_text.get_rect(center=(WIDTH//2, HEIGHT//2))
         self.screen.blit(pause_text, text_rect)
         
-        continue_text = self.font.render("Press ESC to continue, o Q para salir", True, COLORS['white'])
+        continue_text = self.text.render('continue', "Press ESC to continue, o Q para salir", COLORS['white'])
         continue_rect = continue_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 50))
         self.screen.blit(continue_text, continue_rect)
 
     def draw_game_over_screen(self):
-        s = pygame.Surface((WIDTH, HEIGHT))
-        s.set_alpha(128)
-        s.fill(COLORS['black'])
+        s = self.text.overlay((WIDTH, HEIGHT), COLORS['black'], 128)
         self.screen.blit(s, (0, 0))
         
-        game_over_text = self.font.render("GAME OVER", True, COLORS['red'])
+        game_over_text = self.text.render('game_over', "GAME OVER", COLORS['red'])
         text_rect = game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
         self.screen.blit(game_over_text, text_rect)
         
-        score_text = self.font.render(f"Final Score: {self.score}", True, COLORS['white'])
+        score_text = self.text.render('final_score', f"Final Score: {self.score}", COLORS['white'])
         score_rect = score_text.get_rect(center=(WIDTH//2, HEIGHT//2))
         self.screen.blit(score_text, score_rect)
         
         if self.score > self.high_score:
-            new_high_text = self.font.render("New High Score!", True, COLORS['yellow'])
+            new_high_text = self.text.render('new_high', "New High Score!", COLORS['yellow'])
             high_rect = new_high_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 50))
             self.screen.blit(new_high_text, high_rect)
         
-        restart_text = self.font.render("Press R to restart", True, COLORS['white'])
+        restart_text = self.text.render('restart', "Press R to restart", COLORS['white'])
         restart_rect = restart_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 100))
         self.screen.blit(restart_text, restart_rect)
 
+def run_headless(games, max_frames, seed=None, profile_log=None,
+                 track_allocations=False, pilot='idle',
+                 content_path=CONTENT_PATH, broad_phase='grid',
+                 cull_margin=None, record=None):
+    game = Game(headless=True, seed=seed, save_path=None,
+                content_path=content_path, broad_phase=broad_phase,
+                cull_margin=cull_margin)
+    recorder = (InputRecorder(record, game.seed, (WIDTH, HEIGHT),
+                              game.upgrades)
+                if record else None)
+    if profile_log:
+        game.profiler.open_log(profile_log)
+    if track_allocations:
+        game.profiler.track_allocations()
+    total_frames = 0
+    start = time.perf_counter()
+    for number in range(1, games + 1):
+        if number > 1:
+            game.reset_game()
+            if recorder:
+                recorder.mark_reset()
+        frames = game.simulate(max_frames,
+                               make_pilot(pilot, WIDTH, game.seed + number),
+                               recorder)
+        total_frames += frames
+        print(f"game {number}: frames={frames} score={game.score} "
+              f"wave={game.wave} health={game.player.health}")
+    elapsed = time.perf_counter() - start
+    if recorder:
+        recorder.close()
+    if track_allocations:
+        summary = game.profiler.summary()
+        for stage in ('alloc_kb', 'gc_runs'):
+            avg, p99 = summary[stage]
+            print(f"{stage}: {avg:.2f} avg {p99:.2f} p99 per tick "
+                  f"(last {len(game.profiler.history[stage])} ticks)")
+    game.profiler.close()
+    print(f"{games} games, {total_frames} ticks in {elapsed:.2f}s "
+          f"({games / elapsed * 60:.0f} games/min, "
+          f"{total_frames / elapsed:.0f} ticks/s)")
+
+
+def play_replay(path, headless, content_path=CONTENT_PATH,
+                broad_phase='grid'):
+    replay = InputReplay(path)
+    # Play at the recorded resolution; a window scales it to the screen
+    configure_resolution(*replay.resolution)
+    # Replays don't touch the save; they play with the recorded upgrades
+    game = Game(headless=headless, seed=replay.seed, save_path=None,
+                content_path=content_path, broad_phase=broad_phase,
+                scaled=True, upgrades=replay.upgrades)
+    start = time.perf_counter()
+    frames = game.play_replay(replay, render=not headless)
+    elapsed = time.perf_counter() - start
+    print(f"replayed {frames} frames in {elapsed:.2f}s: score={game.score} "
+          f"wave={game.wave} health={game.player.health}")
+
+
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Retro Space Shooter")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate games without a window or rendering")
+    parser.add_argument("--games", type=int, default=1,
+                        help="number of headless games to simulate")
+    parser.add_argument("--frames", type=int, default=FPS * 60 * 5,
+                        help="tick limit per headless game")
+    parser.add_argument("--pilot", choices=PILOTS, default='idle',
+                        help="computer player for headless games")
+    parser.add_argument("--seed", type=int,
+                        help="session seed (random by default)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the session's input to FILE")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play back a recorded session")
+    parser.add_argument("--internal-res", metavar="WxH",
+                        help="fixed render resolution, e.g. 800x600, scaled "
+                             "to the screen (fixes the simulation size when "
+                             "headless)")
+    parser.add_argument("--render-fps", type=int, default=FPS,
+                        help=f"drawing rate cap, 0 for uncapped (the "
+                             f"simulation always runs at {FPS} ticks/s)")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw only changed screen areas")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="draw on a render thread while the next ticks "
+                             "are simulated")
+    parser.add_argument("--pipeline-depth", type=int, choices=(2, 3),
+                        default=2,
+                        help="frames in flight when pipelined (2 = double, "
+                             "3 = triple buffering)")
+    parser.add_argument("--spectate", metavar="[HOST:]PORT",
+                        help="stream the game to viewers on PORT (watch "
+                             "with python spectator.py HOST:PORT)")
+    parser.add_argument("--rewind", type=float, default=10, metavar="SECONDS",
+                        help="seconds of play kept for rewinding with "
+                             "Backspace (0 to turn off; off while recording)")
+    parser.add_argument("--star-layers", metavar="COUNT:MIN:MAX,...",
+                        help="starfield parallax layers, e.g. "
+                             "100000:0.2:0.5,2000:1.5:3")
+    parser.add_argument("--broadphase", choices=BROAD_PHASES, default='grid',
+                        help="collision broad phase: uniform grid, "
+                             "sort-and-sweep along y, or brute force")
+    parser.add_argument("--cull-margin", type=int, metavar="PIXELS",
+                        help="despawn enemies and power-ups this far past "
+                             "the screen edge (default 2 grid units)")
+    parser.add_argument("--no-text-cache", action="store_true",
+                        help="re-render HUD text every frame (for comparison)")
+    parser.add_argument("--profile-log", metavar="FILE",
+                        help="write per-frame stage timings to FILE "
+                             "(JSON lines, or CSV for *.csv)")
+    parser.add_argument("--track-allocations", action="store_true",
+                        help="record per-frame allocations and GC runs "
+                             "(tracemalloc; slower)")
+    parser.add_argument("--content", metavar="FILE", default=CONTENT_PATH,
+                        help="enemy, power-up and wave definitions")
+    parser.add_argument("--watch-content", action="store_true",
+                        help="reload the content file whenever it changes")
+    parser.add_argument("--stats", action="store_true",
+                        help="print cache and pool statistics on exit")
+    args = parser.parse_args()
+
+    if args.internal_res:
+        width, height = (int(n) for n in args.internal_res.lower().split("x"))
+        configure_resolution(width, height)
+    star_layers = None
+    if args.star_layers:
+        star_layers = [(int(count), float(low), float(high))
+                       for count, low, high in (
+                           layer.split(":") for layer in args.star_layers.split(","))]
+
+    if args.replay and args.record:
+        parser.error("--record can't be combined with --replay")
+    if args.replay:
+        play_replay(args.replay, args.headless, args.content, args.broadphase)
+    elif args.headless:
+        run_headless(args.games, args.frames, args.seed, args.profile_log,
+                     args.track_allocations, args.pilot, args.content,
+                     args.broadphase, args.cull_margin, args.record)
+    else:
+        spectator = None
+        if args.spectate:
+            host, _, port = args.spectate.rpartition(':')
+            spectator = SpectatorServer(host or '127.0.0.1', int(port)).start()
+            print(f"spectators: {spectator.host}:{spectator.port}")
+        game = Game(seed=args.seed, dirty_rects=args.dirty_rects,
+                    text_cache=not args.no_text_cache,
+                    scaled=bool(args.internal_res), star_layers=star_layers,
+                    content_path=args.content,
+                    watch_content=args.watch_content,
+                    broad_phase=args.broadphase,
+                    cull_margin=args.cull_margin,
+                    pipelined=args.pipelined,
+                    pipeline_depth=args.pipeline_depth,
+                    spectator=spectator,
+                    rewind_seconds=args.rewind)
+        recorder = (InputRecorder(args.record, game.seed, (WIDTH, HEIGHT),
+                                  game.upgrades)
+                    if args.record else None)
+        if args.profile_log:
+            game.profiler.open_log(args.profile_log)
+        if args.track_allocations:
+            game.profiler.track_allocations()
+        game.run(recorder, args.render_fps)
+        if spectator:
+            spectator.close()
+        if args.stats:
+            print(f"content: loaded in {game.content_load_ms:.2f} ms")
+            print("sprites:", game.sprites.stats())
+            print("entities:", game.lifecycle.stats())
+            if game.pipeline_stats:
+                print("pipeline:", game.pipeline_stats)
+            if spectator:
+                print("spectators:", spectator.stats())
+            if game.rewind is not None:
+                print("rewind:", game.rewind.stats())
+            print("particles:", game.effects.stats())
+            print("text:", game.text.stats())
+            if game.redraw_frames:
+                print(f"redrawn: {game.redraw_total / game.redraw_frames:.1%} "
+                      f"of the screen per frame")
@@ -0,0 +1,93 @@
+"""Computer players for headless runs: ``controller(game) -> Controls``.
+
+Used by ``Game.simulate`` and the balance sweep, so a difficulty setting
+can be judged by how long a reasonable player survives rather than by an
+idle ship.
+"""
+import random
+
+import numpy as np
+
+from inputs import IDLE_CONTROLS, Controls
+
+
+class RandomPilot:
+    """Holds left, right or nothing for a random number of ticks."""
+
+    CHOICES = (Controls(True, False, False, 0),
+               Controls(False, True, False, 0),
+               IDLE_CONTROLS)
+
+    def __init__(self, seed=None, min_hold=5, max_hold=60):
+        self.rng = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.controls = IDLE_CONTROLS
+        self.hold = 0
+
+    def __call__(self, game):
+        if self.hold <= 0:
+            self.controls = self.rng.choice(self.CHOICES)
+            self.hold = self.rng.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.controls
+
+
+class ScriptedPilot:
+    """Keeps out from under incoming enemies and lines up shots on the rest.
+
+    Every tick it scores a row of candidate positions across the screen:
+    the number of enemies within ``danger`` pixels above that would hit the
+    ship there comes first, then the distance to the lowest enemy further
+    up (the one to shoot), then the distance from where the ship is now.
+    Steers with the mouse-follow control, so ``mouse_x`` is the x the ship
+    should centre on.
+    """
+
+    def __init__(self, width, danger=150, candidates=32):
+        self.width = width
+        self.danger = danger
+        self.candidates = candidates
+
+    def __call__(self, game):
+        player = game.player
+        enemies = game.enemies
+        centre = player.x + player.width / 2
+        n = enemies.count
+        if not n:
+            return Controls(False, False, True, int(centre))
+        half = player.width / 2
+        targets = np.linspace(half, self.width - half, self.candidates)
+        widths = enemies.width[:n]
+        xs = enemies.x[:n] + widths / 2
+        tops = enemies.y[:n]
+        bottoms = tops + enemies.height[:n]
+        gap = player.y - bottoms
+        # Level with the ship: in the way of any move that crosses them
+        level = (gap < 0) & (tops < player.y + player.height)
+        incoming = level | ((gap >= 0) & (gap < self.danger))
+        reach = (widths / 2 + player.width)[None, :]
+        offsets = targets[:, None] - xs[None, :]
+        hits = ((np.abs(offsets) < reach) & incoming).sum(axis=1)
+        low = np.minimum(targets, centre)[:, None]
+        high = np.maximum(targets, centre)[:, None]
+        crossed = ((xs + reach > low) & (xs - reach < high) & level).sum(axis=1)
+        ahead = gap >= self.danger
+        aim = xs[ahead][np.argmax(bottoms[ahead])] if ahead.any() else centre
+        score = ((hits + crossed) * 10 * self.width + np.abs(targets - aim)
+                 + np.abs(targets - centre) / 2)
+        return Controls(False, False, True, int(targets[np.argmin(score)]))
+
+
+PILOTS = ('idle', 'random', 'scripted')
+
+
+def make_pilot(name, width, seed=None):
+    """Controller for ``Game.simulate``; None means no input at all."""
+    if name == 'idle':
+        return None
+    if name == 'random':
+        return RandomPilot(seed)
+    if name == 'scripted':
+        return ScriptedPilot(width)
+    raise ValueError(f"unknown pilot {name!r}; expected one of {PILOTS}")
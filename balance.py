@@ -0,0 +1,164 @@
+"""Batch-simulate headless games across a multiprocessing pool to tune the
+difficulty curve.
+
+Every combination of the swept Balance values is played for --games seeds
+by a computer pilot, and the results are summarised per combination:
+survival time, score, waves reached and per-wave kills/damage/duration.
+
+    python balance.py --games 200 --pilot scripted \\
+        --wave-score 800 1000 --spawn-rate-decay 1 2 3 \\
+        --weight-growth 0.1,0.1,0.1,0.1 0,0.1,0.3,0.5 --json sweep.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+from loader import load_game
+
+
+def play(job):
+    """Worker: play one seeded game with the given balance and pilot."""
+    balance, pilot, seed, max_frames = job
+    game_module = load_game()
+    from autopilot import make_pilot
+    from content import Balance
+    game = game_module.Game(headless=True, seed=seed, save_path=None,
+                            balance=Balance(*balance))
+    frames = game.simulate(max_frames, make_pilot(pilot, game_module.WIDTH, seed))
+    return balance, {
+        'frames': frames,
+        'survived': not game.game_over,
+        'score': game.score,
+        'wave': game.wave,
+        'waves': game.wave_stats,
+    }
+
+
+def summarize(results, fps):
+    frames = [result['frames'] for result in results]
+    scores = [result['score'] for result in results]
+    waves = {}
+    for result in results:
+        for stats in result['waves']:
+            totals = waves.setdefault(stats['wave'], {'reached': 0})
+            totals['reached'] += 1
+            for key, value in stats.items():
+                if key != 'wave':
+                    totals[key] = totals.get(key, 0) + value
+    per_wave = {}
+    for wave, totals in sorted(waves.items()):
+        reached = totals.pop('reached')
+        per_wave[wave] = {'reached': reached / len(results)}
+        per_wave[wave].update((key, value / reached)
+                              for key, value in totals.items())
+    return {
+        'games': len(results),
+        'survival_s': statistics.mean(frames) / fps,
+        'survival_median_s': statistics.median(frames) / fps,
+        'survived': sum(result['survived'] for result in results) / len(results),
+        'score': statistics.mean(scores),
+        'score_median': statistics.median(scores),
+        'max_wave': max(result['wave'] for result in results),
+        'waves': per_wave,
+    }
+
+
+def weights(text):
+    return tuple(float(value) for value in text.split(','))
+
+
+def main():
+    game_module = load_game()
+    from autopilot import PILOTS
+    from content import Balance, load_content
+    content, _ = load_content(game_module.CONTENT_PATH, game_module.SCALE_FACTOR,
+                              game_module.BASE_UNIT, game_module.COLORS)
+    default = content.balance
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100,
+                        help="games (seeds) per balance combination")
+    parser.add_argument("--frames", type=int, default=game_module.FPS * 60 * 5,
+                        help="tick limit per game")
+    parser.add_argument("--pilot", choices=PILOTS, default='scripted')
+    parser.add_argument("--seed", type=int, default=0,
+                        help="first seed; games use seed, seed+1, ...")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes (1 runs in this process)")
+    parser.add_argument("--enemy-weights", type=weights, nargs="+",
+                        default=[default.enemy_weights])
+    parser.add_argument("--weight-growth", type=weights, nargs="+",
+                        default=[default.weight_growth])
+    parser.add_argument("--wave-score", type=int, nargs="+",
+                        default=[default.wave_score])
+    parser.add_argument("--spawn-rate", type=int, nargs="+",
+                        default=[default.spawn_rate])
+    parser.add_argument("--spawn-rate-decay", type=int, nargs="+",
+                        default=[default.spawn_rate_decay])
+    parser.add_argument("--min-spawn-rate", type=int, nargs="+",
+                        default=[default.min_spawn_rate])
+    parser.add_argument("--json", metavar="FILE",
+                        help="write every combination's summary to FILE")
+    args = parser.parse_args()
+    for values in args.enemy_weights + args.weight_growth:
+        if len(values) != len(content.kinds):
+            parser.error(f"weights need one value per enemy kind "
+                         f"({','.join(content.kinds)})")
+
+    combinations = list(itertools.product(
+        args.enemy_weights, args.weight_growth, args.wave_score,
+        args.spawn_rate, args.spawn_rate_decay, args.min_spawn_rate))
+    jobs = [(balance, args.pilot, seed, args.frames)
+            for balance in combinations
+            for seed in range(args.seed, args.seed + args.games)]
+
+    results = {balance: [] for balance in combinations}
+    start = time.perf_counter()
+    if args.processes == 1:
+        outcomes = map(play, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(args.processes)
+        # Games vary a lot in length; small chunks keep every worker busy
+        outcomes = pool.imap_unordered(play, jobs, chunksize=2)
+    for done, (balance, result) in enumerate(outcomes, 1):
+        results[tuple(balance)].append(result)
+        if done % 50 == 0:
+            print(f"{done}/{len(jobs)} games", file=sys.stderr)
+    if pool:
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+
+    summaries = []
+    print(f"{'weights':>22} {'growth':>18} {'score/wave':>10} {'rate':>4} "
+          f"{'decay':>5} {'min':>4} {'survival s':>10} {'survived':>8} "
+          f"{'score':>8} {'max wave':>8}")
+    for balance in combinations:
+        summary = summarize(results[balance], game_module.FPS)
+        summaries.append({'balance': Balance(*balance)._asdict(),
+                          'summary': summary})
+        enemy_weights, growth, wave_score, rate, decay, minimum = balance
+        print(f"{','.join(f'{w:g}' for w in enemy_weights):>22} "
+              f"{','.join(f'{g:g}' for g in growth):>18} {wave_score:10d} "
+              f"{rate:4d} {decay:5d} {minimum:4d} "
+              f"{summary['survival_s']:10.1f} {summary['survived']:8.0%} "
+              f"{summary['score']:8.0f} {summary['max_wave']:8d}")
+    ticks = sum(result['frames'] for games in results.values()
+                for result in games)
+    print(f"{len(jobs)} games, {ticks} ticks in {elapsed:.1f}s on "
+          f"{args.processes} process(es) ({len(jobs) / elapsed * 60:.0f} "
+          f"games/min, {ticks / elapsed:.0f} ticks/s)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'pilot': args.pilot, 'games': args.games,
+                       'frames': args.frames, 'results': summaries}, f,
+                      indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from loader import load_game  # noqa: E402
+
+
+def top_up(game, target, rng):
+    """Spawn enemies across the top half of the screen until ``game`` has
+    ``target`` of them."""
+    height = load_game().HEIGHT
+    enemies = game.enemies
+    while enemies.count < target:
+        row = enemies.spawn(rng.randrange(len(enemies.kinds)), rng)
+        enemies.y[row] = enemies.prev_y[row] = rng.randint(0, height // 2)
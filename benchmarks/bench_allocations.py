@@ -0,0 +1,79 @@
+"""Steady-state allocation and GC counters for the game loop.
+
+Plays a seeded game with auto-fire for --warmup frames, then measures
+--frames more with tracemalloc: bytes allocated and freed again within a
+frame (transient), blocks still held at the end (retained) and garbage
+collections per generation from gc.get_stats().
+
+    python benchmarks/bench_allocations.py --frames 1200 --top 5
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from _game import load_game
+
+game_module = load_game()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--warmup", type=int, default=600)
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--render", action="store_true",
+                        help="include Game.draw in every frame")
+    parser.add_argument("--top", type=int, default=0,
+                        help="show the source lines retaining the most memory")
+    args = parser.parse_args()
+
+    game = game_module.Game(seed=2, save_path=None)
+    controls = game_module.Controls(False, False, True, game_module.WIDTH // 2)
+
+    def step():
+        game.update(controls)
+        if args.render:
+            game.draw()
+        if game.game_over:
+            game.reset_game()
+
+    for _ in range(args.warmup):
+        step()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot() if args.top else None
+    collections = [stats['collections'] for stats in gc.get_stats()]
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    transient = [0] * args.frames
+    start = time.perf_counter()
+    for frame in range(args.frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+        transient[frame] = peak - current
+    elapsed = time.perf_counter() - start
+    end_bytes, _ = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot() if args.top else None
+    tracemalloc.stop()
+    runs = [stats['collections'] - old
+            for stats, old in zip(gc.get_stats(), collections)]
+
+    transient.sort()
+    print(f"frames: {args.frames} ({elapsed / args.frames * 1000:.3f} ms/frame "
+          f"under tracemalloc)")
+    print(f"entities: enemies={game.enemies.count} bullets={game.bullets.count} "
+          f"particles={game.effects.count}")
+    print(f"transient KB/frame: avg {sum(transient) / len(transient) / 1024:.1f}"
+          f"  p99 {transient[int(len(transient) * 0.99)] / 1024:.1f}"
+          f"  max {transient[-1] / 1024:.1f}")
+    print(f"retained over the run: {(end_bytes - start_bytes) / 1024:+.1f} KB")
+    print(f"gc collections (gen0, gen1, gen2): {tuple(runs)}")
+    if args.top:
+        for stat in after.compare_to(before, 'lineno')[:args.top]:
+            print(" ", stat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Collision pass timing for every broad phase across enemy-size mixes.
+
+Each distribution resizes the spawned enemies before timing
+handle_collisions with the grid, sort-and-sweep and (optionally) brute
+force. Every broad phase must produce the same outcome. The last columns
+time the broad phase alone (indexing the bullets, one query per enemy)
+and count the candidates it hands to the exact test.
+
+    python benchmarks/bench_broadphase.py --enemies 2000 --bullets 4000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from _game import load_game
+
+game_module = load_game()
+
+from spatial import BROAD_PHASES, make_broad_phase  # noqa: E402
+
+# Enemy side length as a multiple of BASE_UNIT, drawn per enemy
+DISTRIBUTIONS = {
+    'content': None,  # the sizes content.json gives each kind
+    'small': lambda rng: rng.uniform(0.3, 0.6),
+    'uniform': lambda rng: rng.uniform(0.3, 3.0),
+    'few huge': lambda rng: 6.0 if rng.random() < 0.02 else rng.uniform(0.3, 0.8),
+}
+
+
+def populate(game, args, distribution):
+    rng = random.Random(args.seed)
+    game.reset_game()
+    game.player.invulnerable = 0
+    enemies = game.enemies
+    for _ in range(args.enemies):
+        row = enemies.spawn(rng.randrange(len(enemies.kinds)), rng)
+        if distribution:
+            size = max(1, int(distribution(rng) * game_module.BASE_UNIT))
+            enemies.width[row] = enemies.height[row] = size
+            enemies.x[row] = rng.randint(0, game_module.WIDTH - size)
+        enemies.y[row] = rng.randint(
+            0, game_module.HEIGHT - int(enemies.height[row]))
+    offsets = [(rng.randint(0, game_module.WIDTH),
+                rng.randint(0, game_module.HEIGHT)) for _ in range(args.bullets)]
+    game.player.bullets.fire(0, 0, np.array(offsets, dtype=np.float64).reshape(-1, 2),
+                             game.player.damage)
+    game.player.x = game_module.WIDTH // 2
+    game.player.y = game_module.HEIGHT - game.player.height
+
+
+def run(game, name, distribution, args):
+    game.broad_phase = make_broad_phase(name, game_module.BASE_UNIT * 2)
+    best = float("inf")
+    for _ in range(args.repeat):
+        populate(game, args, distribution)
+        game.rng = random.Random(args.seed)
+        start = time.perf_counter()
+        game.handle_collisions()
+        best = min(best, time.perf_counter() - start)
+    outcome = (game.score, len(game.enemies), len(game.player.bullets),
+               len(game.powerups), game.player.health)
+    return best, outcome
+
+
+def probe(game, name, distribution, args):
+    broad_phase = make_broad_phase(name, game_module.BASE_UNIT * 2)
+    populate(game, args, distribution)
+    bullets = game.bullets
+    enemies = game.enemies
+    n = bullets.count
+    bullet_rects = [(x, y, bullets.width, bullets.height)
+                    for x, y in zip(bullets.x[:n].tolist(),
+                                    bullets.y[:n].tolist())]
+    n = enemies.count
+    enemy_rects = list(zip(enemies.x[:n].tolist(), enemies.y[:n].tolist(),
+                           enemies.width[:n].tolist(),
+                           enemies.height[:n].tolist()))
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        broad_phase.build(bullet_rects)
+        candidates = sum(len(broad_phase.query(*rect)) for rect in enemy_rects)
+        best = min(best, time.perf_counter() - start)
+    return best, candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=2000)
+    parser.add_argument("--bullets", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--phases", nargs="+", choices=BROAD_PHASES,
+                        default=['grid', 'sweep'])
+    args = parser.parse_args()
+
+    game = game_module.Game(headless=True, save_path=None)
+    print(f"enemies={args.enemies} bullets={args.bullets}")
+    print(f"{'sizes':>10} "
+          + " ".join(f"{name + ' ms':>10}" for name in args.phases) + " |"
+          + " ".join(f"{name + ' ms':>10} {'cands':>7}" for name in args.phases))
+    for label, distribution in DISTRIBUTIONS.items():
+        times = []
+        probes = []
+        outcomes = set()
+        for name in args.phases:
+            elapsed, outcome = run(game, name, distribution, args)
+            times.append(elapsed)
+            outcomes.add(outcome)
+            probes.append(probe(game, name, distribution, args))
+        print(f"{label:>10} " + " ".join(f"{t * 1000:10.2f}" for t in times)
+              + " |" + " ".join(f"{t * 1000:10.2f} {c:7d}" for t, c in probes))
+        if len(outcomes) > 1:
+            raise SystemExit(f"{label}: broad phases disagree: {outcomes}")
+
+
+if __name__ == "__main__":
+    main()
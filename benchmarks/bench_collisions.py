@@ -0,0 +1,74 @@
+"""Collision pass timing: brute force vs. spatial grid.
+
+Both run the game's current handle_collisions; only the broad phase
+differs. The brute-force one tests every pair, so it stands in for the
+cost of having no broad phase, not for the original per-object loop.
+
+    python benchmarks/bench_collisions.py --enemies 2000 --bullets 4000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from _game import load_game
+
+game_module = load_game()
+
+from spatial import BruteForce, SpatialGrid  # noqa: E402
+
+
+def populate(game, enemies, bullets, seed):
+    rng = random.Random(seed)
+    game.reset_game()
+    game.player.invulnerable = 0
+    for _ in range(enemies):
+        row = game.enemies.spawn(rng.randrange(len(game.enemies.kinds)), rng)
+        game.enemies.y[row] = rng.randint(
+            0, game_module.HEIGHT - int(game.enemies.height[row]))
+    offsets = [(rng.randint(0, game_module.WIDTH),
+                rng.randint(0, game_module.HEIGHT)) for _ in range(bullets)]
+    game.player.bullets.fire(0, 0, np.array(offsets, dtype=np.float64).reshape(-1, 2),
+                             game.player.damage)
+    game.player.x = game_module.WIDTH // 2
+    game.player.y = game_module.HEIGHT - game.player.height
+
+
+def run(game, broad_phase, args):
+    game.broad_phase = broad_phase
+    best = float("inf")
+    for _ in range(args.repeat):
+        populate(game, args.enemies, args.bullets, args.seed)
+        game.rng = random.Random(args.seed)
+        start = time.perf_counter()
+        game.handle_collisions()
+        best = min(best, time.perf_counter() - start)
+    outcome = (game.score, len(game.enemies), len(game.player.bullets),
+               len(game.powerups), game.player.health)
+    return best, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=2000)
+    parser.add_argument("--bullets", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    game = game_module.Game()
+    brute_time, brute_outcome = run(game, BruteForce(), args)
+    grid_time, grid_outcome = run(game, SpatialGrid(game_module.BASE_UNIT * 2), args)
+
+    print(f"enemies={args.enemies} bullets={args.bullets}")
+    print(f"brute force : {brute_time * 1000:9.2f} ms")
+    print(f"spatial grid: {grid_time * 1000:9.2f} ms  "
+          f"({brute_time / grid_time:.1f}x)")
+    if brute_outcome != grid_outcome:
+        raise SystemExit(f"results differ: {brute_outcome} != {grid_outcome}")
+    print("results identical:", grid_outcome)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Content loading: time to read and compile content.json, and a hot reload.
+
+Loads the file --repeats times, then times one hot reload through
+ContentWatcher (touching the file, polling, swapping it into a running
+game). Fails if a load or the reload takes longer than --budget-ms.
+
+    python benchmarks/bench_content.py --repeats 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from _game import load_game
+
+game_module = load_game()
+
+from content import ContentWatcher, load_content  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content", default=game_module.CONTENT_PATH)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=5.0,
+                        help="slowest acceptable load or reload")
+    args = parser.parse_args()
+
+    resolution = (game_module.SCALE_FACTOR, game_module.BASE_UNIT,
+                  game_module.COLORS)
+    loads = sorted(load_content(args.content, *resolution)[1]
+                   for _ in range(args.repeats))
+    print(f"load:   median {statistics.median(loads):.3f} ms, "
+          f"max {loads[-1]:.3f} ms over {args.repeats} loads")
+
+    game = game_module.Game(seed=1, save_path=None, content_path=args.content)
+    watcher = ContentWatcher(args.content, *resolution, interval=0)
+    stat = os.stat(args.content)
+    # Bump the mtime without changing the file so the watcher sees an edit
+    os.utime(args.content, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    try:
+        start = time.perf_counter()
+        content = watcher.poll()
+        game.apply_content(content)
+        reload_ms = (time.perf_counter() - start) * 1000
+    finally:
+        os.utime(args.content, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    print(f"reload: {reload_ms:.3f} ms (poll + compile + apply)")
+
+    slowest = max(loads[-1], reload_ms)
+    if slowest > args.budget_ms:
+        sys.exit(f"content took {slowest:.2f} ms, over {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""ECS stress test: per-frame system update and draw time at large entity counts.
+
+    python benchmarks/bench_entities.py --counts 1000 10000 50000
+"""
+import argparse
+import random
+import time
+
+from _game import load_game
+
+game_module = load_game()
+
+from ecs import expire, integrate  # noqa: E402
+
+
+def populate(game, count, rng):
+    game.reset_game()
+    enemies = game.enemies
+    for _ in range(count):
+        row = enemies.spawn(rng.randrange(len(enemies.kinds)), rng)
+        enemies.y[row] = rng.randint(0, game_module.HEIGHT)
+    power_kinds = len(game.content.powerup_kinds)
+    for _ in range(count // 10):
+        game.powerups.spawn(rng.randint(0, game_module.WIDTH),
+                            rng.randint(0, game_module.HEIGHT),
+                            rng.randrange(power_kinds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[1000, 10000, 50000])
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+
+    game = game_module.Game(seed=1)
+    rng = random.Random(1)
+    print(f"{'enemies':>8} {'powerups':>8} {'update ms':>10} {'draw ms':>10}")
+    for count in args.counts:
+        populate(game, count, rng)
+        update_time = draw_time = 0.0
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            integrate(game.world)
+            expire(game.world)
+            game.enemies.update()
+            game.powerups.update()
+            mid = time.perf_counter()
+            game.screen.fill((0, 0, 0))
+            game.enemies.draw(game.screen, game.sprites)
+            game.powerups.draw(game.screen, game.sprites)
+            draw_time += time.perf_counter() - mid
+            update_time += mid - start
+        print(f"{count:8d} {len(game.powerups):8d} "
+              f"{update_time / args.frames * 1000:10.3f} "
+              f"{draw_time / args.frames * 1000:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
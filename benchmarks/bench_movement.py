@@ -0,0 +1,76 @@
+"""Enemy movement: per-enemy math.sin/cos branches vs. the pattern table.
+
+    python benchmarks/bench_movement.py --counts 1000 10000
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from _game import load_game
+
+game_module = load_game()
+
+
+def reference_step(xs, ys, times, speeds, patterns):
+    # The original Enemy.update, one Python object at a time
+    for i, pattern in enumerate(patterns):
+        times[i] += 1
+        ys[i] += speeds[i]
+        if pattern == 'sine':
+            xs[i] += math.sin(times[i] * 0.1) * 2
+        elif pattern == 'zigzag':
+            xs[i] += math.cos(times[i] * 0.1) * 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    game = game_module.Game(seed=1)
+    enemies = game.enemies
+    names = enemies.PATTERNS.names
+    print(f"{'enemies':>8} {'reference ms':>13} {'table ms':>9} {'speedup':>8} "
+          f"{'max |dx|':>10}")
+    for count in args.counts:
+        game.reset_game()
+        rng = random.Random(count)
+        for _ in range(count):
+            row = enemies.spawn(rng.randrange(len(enemies.kinds)), rng)
+            # Stagger ages so enemies sit at different points of their wave
+            enemies.age[row] = rng.randint(0, 200)
+        n = enemies.count
+        xs = enemies.x[:n].tolist()
+        ys = enemies.y[:n].tolist()
+        times = enemies.age[:n].tolist()
+        speeds = enemies.vy[:n].tolist()
+        patterns = [names[p] for p in enemies.pattern[:n].tolist()]
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            reference_step(xs, ys, times, speeds, patterns)
+        reference = (time.perf_counter() - start) / args.frames
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            # Same order as Game.update: integrate, expire, patterns
+            enemies.x[:n] += enemies.vx[:n]
+            enemies.y[:n] += enemies.vy[:n]
+            enemies.age[:n] += 1
+            enemies.update()
+        table = (time.perf_counter() - start) / args.frames
+
+        error = max(np.abs(enemies.x[:n] - np.array(xs)).max(),
+                    np.abs(enemies.y[:n] - np.array(ys)).max())
+        print(f"{count:8d} {reference * 1000:13.3f} {table * 1000:9.3f} "
+              f"{reference / table:7.1f}x {error:10.2e}")
+        if error > 1e-6:
+            raise SystemExit("trajectories diverged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Serial vs. pipelined rendering: frame rate and capture-to-present latency.
+
+Runs the same seeded game one tick per frame, drawing either on the game
+thread or through a RenderPipeline of depth 2 and 3, with --enemies kept
+on screen so there is real drawing to overlap with simulation. Latency
+is measured from capturing a frame to the end of its present.
+
+    python benchmarks/bench_pipeline.py --frames 600 --enemies 2000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from _game import load_game, top_up
+
+game_module = load_game()
+
+from pipeline import RenderPipeline  # noqa: E402
+
+
+def run(mode, args):
+    game = game_module.Game(seed=args.seed, save_path=None,
+                            entity_caps={}, star_layers=args.star_layers)
+    rng = random.Random(args.seed)
+    controls = game_module.Controls(False, False, True, game_module.WIDTH // 2)
+    pipeline = (RenderPipeline(game.render_pipelined, depth=mode)
+                if mode else None)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        top_up(game, args.enemies, rng)
+        game.update(controls)
+        game.player.health = game.player.max_health
+        if pipeline:
+            pipeline.submit(game.capture(frozen=True))
+        else:
+            frame = game.capture()
+            game.render(frame)
+            latencies.append(time.perf_counter() - frame.created)
+    if pipeline:
+        pipeline.flush()
+        elapsed = time.perf_counter() - start
+        pipeline.close()
+        stats = pipeline.stats()
+        return (elapsed, stats['latency_ms'], stats['latency_p99_ms'],
+                stats['stalls'])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (elapsed, statistics.mean(latencies) * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--enemies", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stars", type=int, default=2000,
+                        help="stars in the per-star (non-baked) layer")
+    args = parser.parse_args()
+    args.star_layers = [(args.stars, 0.5, 2.0)]
+
+    print(f"frames={args.frames} enemies={args.enemies} stars={args.stars}")
+    print(f"{'mode':>10} {'fps':>8} {'latency ms':>11} {'p99 ms':>8} "
+          f"{'stalls':>7}")
+    for label, mode in (("serial", None), ("depth 2", 2), ("depth 3", 3)):
+        elapsed, latency, p99, stalls = run(mode, args)
+        print(f"{label:>10} {args.frames / elapsed:8.1f} {latency:11.2f} "
+              f"{p99:8.2f} {stalls:7d}")
+
+
+if __name__ == "__main__":
+    main()
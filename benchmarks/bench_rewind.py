@@ -0,0 +1,101 @@
+"""Rewind buffer: capture cost per tick and memory per second of history.
+
+Plays a seeded game with the scripted pilot, optionally keeping each of
+--counts enemies on screen (caps off, player immortal), and records every
+tick into a RewindBuffer holding --seconds of history. Reports the
+per-tick cost of record() (capture plus delta encoding), the mean delta
+size, memory per second of history and for the whole buffer, how long
+rewinding one second and the whole buffer takes, and the size of a
+save-state. Then checks that the rewound state is exactly the one
+recorded at that tick and, in normal play, that replaying the same input
+from it ends where the game did.
+
+    python benchmarks/bench_rewind.py --counts 0 500 2000 --seconds 10
+"""
+import argparse
+import random
+import sys
+import time
+
+from _game import load_game, top_up
+
+game_module = load_game()
+
+from autopilot import make_pilot  # noqa: E402
+from rewind import RewindBuffer, capture, save_state  # noqa: E402
+
+
+def play(game, pilot, count, rng, ticks, buffer=None, history=None):
+    inputs = []
+    for _ in range(ticks):
+        if count:
+            top_up(game, count, rng)
+        controls = pilot(game)
+        inputs.append(controls)
+        game.update(controls)
+        if count:
+            game.player.health = game.player.max_health
+        if buffer is not None:
+            buffer.record(game)
+        if history is not None:
+            history.append(capture(game))
+    return inputs
+
+
+def run(count, args):
+    fps = game_module.FPS
+    frames = int(args.seconds * fps)
+    game = game_module.Game(headless=True, seed=args.seed, save_path=None,
+                            entity_caps={} if count else None)
+    pilot = make_pilot('scripted', game_module.WIDTH, args.seed)
+    rng = random.Random(args.seed)
+    # Warm up, then fill the buffer; the last second is also kept whole
+    play(game, pilot, count, rng, args.warmup)
+    buffer = RewindBuffer(frames)
+    play(game, pilot, count, rng, frames - fps, buffer)
+    history = []
+    inputs = play(game, pilot, count, rng, fps, buffer, history)
+    stats = buffer.stats()
+    end = capture(game)
+    state_size = len(save_state(game))
+
+    start = time.perf_counter()
+    buffer.rewind(game, fps - 1)
+    one_second = time.perf_counter() - start
+    if capture(game) != history[0]:
+        sys.exit(f"{count} enemies: rewound state differs")
+    feed = iter(inputs[1:])
+    play(game, lambda game: next(feed), count, rng, fps - 1)
+    if count == 0 and capture(game) != end:
+        sys.exit("replaying from the rewound state diverged")
+    start = time.perf_counter()
+    steps = buffer.rewind(game, frames)
+    whole = (time.perf_counter() - start) * frames / max(steps, 1)
+    return stats, one_second, whole, state_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[0, 500, 2000],
+                        help="enemies kept on screen (0 = normal play)")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fps = game_module.FPS
+    print(f"{args.seconds:g} s of history at {fps} ticks/s")
+    print(f"{'enemies':>8} {'record ms':>10} {'p99':>6} {'delta B':>8} "
+          f"{'KB/s':>7} {'buffer KB':>10} {'rewind 1s ms':>13} "
+          f"{'rewind all ms':>14} {'save B':>8}")
+    for count in args.counts:
+        stats, one_second, whole, state_size = run(count, args)
+        print(f"{count:8d} {stats['capture_ms']:10.3f} "
+              f"{stats['capture_p99_ms']:6.2f} {stats['delta_bytes']:8.0f} "
+              f"{stats['delta_bytes'] * fps / 1024:7.1f} {stats['kb']:10.0f} "
+              f"{one_second * 1000:13.2f} {whole * 1000:14.1f} "
+              f"{state_size:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Save persistence under a slow disk: frame times while games are saved.
+
+Every write sleeps for --disk-latency to mimic a slow or busy disk. The
+same frames are timed with writes done inline on the game thread (how
+save_high_score used to work) and through the background SaveService;
+the run fails if any frame of the background mode misses the budget.
+
+    python benchmarks/bench_saves.py --disk-latency 0.25 --frames 600
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from _game import load_game
+
+game_module = load_game()
+
+from persistence import SaveService  # noqa: E402
+
+
+class SlowDiskSaves(SaveService):
+    def __init__(self, path, latency, inline=False):
+        self.latency = latency
+        self.inline = inline
+        super().__init__(path)
+
+    def _write(self, data):
+        time.sleep(self.latency)
+        super()._write(data)
+
+    def save(self):
+        if self.inline:
+            self._write(self.data)
+            self.writes += 1
+        else:
+            super().save()
+
+
+def run(game, frames, save_every):
+    controls = game_module.Controls(False, False, True, game_module.WIDTH // 2)
+    times = []
+    for frame in range(1, frames + 1):
+        start = time.perf_counter()
+        game.update(controls)
+        if frame % save_every == 0:
+            game.save_game()
+        game.draw()
+        times.append(time.perf_counter() - start)
+        if game.game_over:
+            game.reset_game()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--disk-latency", type=float, default=0.25,
+                        help="seconds each save write takes")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--save-every", type=int, default=60,
+                        help="frames between saves")
+    parser.add_argument("--budget-ms", type=float,
+                        default=1000 / game_module.FPS)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'mode':>10} {'writes':>6} {'max ms':>8} {'p99 ms':>8} {'over budget':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("inline", "background"):
+            path = os.path.join(directory, f"{mode}.json")
+            game = game_module.Game(seed=1, save_path=None)
+            game.saves = SlowDiskSaves(path, args.disk_latency,
+                                       inline=mode == "inline")
+            times = sorted(run(game, args.frames, args.save_every))
+            game.saves.flush()
+            game.saves.close()
+            over = sum(t * 1000 > args.budget_ms for t in times)
+            p99 = times[int(len(times) * 0.99)]
+            print(f"{mode:>10} {game.saves.writes:6d} {times[-1] * 1000:8.2f} "
+                  f"{p99 * 1000:8.2f} {over:12d}")
+            if mode == "background" and over:
+                failed = True
+    if failed:
+        sys.exit(f"background saves stalled frames past {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
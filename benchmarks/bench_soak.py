@@ -0,0 +1,88 @@
+"""Soak test: entity counts and tick time over a long session.
+
+Simulates --minutes of play (default an hour, at 60 ticks/s) with the
+player kept alive, and reports per simulated minute the mean tick time
+and the live entity counts. The difficulty is held at --wave so the
+workload stays the same and any growth is a leak (--wave 0 lets waves
+advance as usual). Fails if enemies or power-ups exceed their caps, or
+if the last ten minutes tick more than --tolerance slower than minutes
+5-15. --no-cull turns despawning and caps off to show the old growth.
+
+    python benchmarks/bench_soak.py --minutes 60
+    python benchmarks/bench_soak.py --minutes 10 --no-cull
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from _game import load_game
+
+game_module = load_game()
+
+NAMES = ('enemies', 'powerups', 'bullets', 'particles')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report-every", type=int, default=5,
+                        help="print every N simulated minutes")
+    parser.add_argument("--wave", type=int, default=10,
+                        help="difficulty to hold (0 = advance normally)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--no-cull", action="store_true")
+    args = parser.parse_args()
+
+    game = game_module.Game(headless=True, seed=args.seed, save_path=None,
+                            entity_caps={} if args.no_cull else None)
+    if args.no_cull:
+        game.lifecycle.margin = None
+    if args.wave:
+        balance = game.balance
+        game.balance = balance._replace(wave_score=sys.maxsize)
+        game.wave = args.wave
+        game.spawn_rate = max(balance.min_spawn_rate, balance.spawn_rate
+                              - (args.wave - 1) * balance.spawn_rate_decay)
+        game.spawn_weights = game.content.spawn_table(args.wave, balance)
+    player = game.player
+    controls = game_module.IDLE_CONTROLS
+    ticks_per_minute = game_module.FPS * 60
+    minutes = []
+    print(f"{'minute':>6} {'wave':>5} {'ms/tick':>8} "
+          + " ".join(f"{name:>9}" for name in NAMES))
+    for minute in range(1, args.minutes + 1):
+        start = time.perf_counter()
+        for _ in range(ticks_per_minute):
+            game.update(controls)
+            # Immortal player, so the session never ends
+            player.health = player.max_health
+        ms = (time.perf_counter() - start) * 1000 / ticks_per_minute
+        counts = {name: stats['live']
+                  for name, stats in game.lifecycle.stats().items()}
+        minutes.append((ms, counts))
+        if minute % args.report_every == 0 or minute == 1:
+            print(f"{minute:6d} {game.wave:5d} {ms:8.3f} "
+                  + " ".join(f"{counts[name]:9d}" for name in NAMES))
+
+    stats = game.lifecycle.stats()
+    for name in NAMES:
+        print(f"{name}: {stats[name]}")
+    failures = []
+    for name, cap in game_module.ENTITY_CAPS.items():
+        if not args.no_cull and stats[name]['peak'] > cap:
+            failures.append(f"{name} peaked at {stats[name]['peak']} "
+                            f"over the cap of {cap}")
+    if len(minutes) >= 25:
+        early = statistics.mean(ms for ms, _ in minutes[4:15])
+        late = statistics.mean(ms for ms, _ in minutes[-10:])
+        print(f"ms/tick: minutes 5-15 {early:.3f}, last 10 {late:.3f}")
+        if late > early * (1 + args.tolerance):
+            failures.append(f"tick time grew from {early:.3f} to {late:.3f} ms")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
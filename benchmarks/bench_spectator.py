@@ -0,0 +1,104 @@
+"""Spectator stream: bandwidth and encode time per tick at high entity counts.
+
+For each entity count a headless game (caps off, player immortal) is
+topped up to that many enemies every tick and published to a loopback
+SpectatorServer watched by --viewers clients. Reports the mean message
+size against sending a full keyframe every tick, the stream rate at 60
+ticks/s, encode and decode time per tick, and checks that every viewer
+ends on exactly the game's state.
+
+    python benchmarks/bench_spectator.py --counts 100 1000 5000 --viewers 4
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from _game import load_game, top_up
+
+game_module = load_game()
+
+from spectator import (KEYFRAME, SpectatorClient, SpectatorServer,  # noqa: E402
+                       capture_tables)
+
+
+async def run(count, args):
+    game = game_module.Game(headless=True, seed=args.seed, save_path=None,
+                            entity_caps={})
+    rng = random.Random(args.seed)
+    controls = game_module.Controls(False, False, True, game_module.WIDTH // 2)
+    server = SpectatorServer(keyframe_interval=args.keyframe_interval).start()
+    viewers = [SpectatorClient() for _ in range(args.viewers)]
+    for viewer in viewers:
+        await viewer.connect('127.0.0.1', server.port)
+    sizes = {KEYFRAME: [], 'delta': []}
+    decode = []
+    try:
+        for _ in range(args.ticks):
+            top_up(game, count, rng)
+            game.update(controls)
+            game.player.health = game.player.max_health
+            kind = server.publish(game)
+            sizes[KEYFRAME if kind == KEYFRAME else 'delta'].append(
+                server.tick_bytes[-1])
+            # Viewers keep up; the first one's decode time is timed
+            for index, viewer in enumerate(viewers):
+                while viewer.state.tick < server.encoder.tick:
+                    start = time.perf_counter()
+                    await viewer.receive()
+                    if index == 0:
+                        decode.append(time.perf_counter() - start)
+            if kind == KEYFRAME:
+                # Deltas only go to viewers whose ack has reached the server
+                keyframe = server.encoder.keyframe
+                while any(viewer.acked != keyframe
+                          for viewer in list(server.viewers)):
+                    await asyncio.sleep(0.0005)
+        enemy, powerup = capture_tables(game)
+        for viewer in viewers:
+            state = viewer.state
+            if (len(state.enemies) != len(enemy)
+                    or not (state.enemies == enemy).all()
+                    or len(state.powerups) != len(powerup)
+                    or not (state.powerups == powerup).all()
+                    or state.score != game.score):
+                sys.exit(f"{count} enemies: a viewer's state differs")
+        for viewer in viewers:
+            await viewer.close()
+    finally:
+        stats = server.stats()
+        server.close()
+    return stats, sizes, decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[100, 1000, 5000])
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--viewers", type=int, default=4)
+    parser.add_argument("--keyframe-interval", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fps = game_module.FPS
+    print(f"{'enemies':>8} {'keyframe B':>11} {'delta B':>8} {'mean B':>8} "
+          f"{'vs full':>7} {'KB/s':>8} {'encode ms':>10} {'p99':>6} "
+          f"{'decode ms':>10}")
+    for count in args.counts:
+        stats, sizes, decode = asyncio.run(run(count, args))
+        keyframe = statistics.mean(sizes[KEYFRAME])
+        delta = statistics.mean(sizes['delta']) if sizes['delta'] else 0.0
+        mean = stats['bytes_per_tick']
+        print(f"{count:8d} {keyframe:11.0f} {delta:8.0f} {mean:8.0f} "
+              f"{mean / keyframe:7.0%} {mean * fps / 1024:8.1f} "
+              f"{stats['encode_ms']:10.3f} {stats['encode_p99_ms']:6.2f} "
+              f"{statistics.mean(decode) * 1000:10.3f}")
+    print(f"one encoded stream is shared by all {args.viewers} viewers; "
+          f"the server writes the same bytes to each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Enemy drawing: per-frame primitives vs. cached sprites + blits().
+
+    python benchmarks/bench_sprites.py --enemies 5000
+"""
+import argparse
+import random
+import time
+
+from _game import load_game
+
+game_module = load_game()
+
+import pygame  # noqa: E402
+
+
+def draw_primitives(screen, enemies):
+    # The pre-cache Enemy.draw: rebuild every shape each frame
+    n = enemies.count
+    for kind, x, y, w, h in zip(enemies.sprite[:n].tolist(),
+                                enemies.x[:n].tolist(), enemies.y[:n].tolist(),
+                                enemies.width[:n].tolist(),
+                                enemies.height[:n].tolist()):
+        shape = enemies.kind_shape[kind]
+        color = enemies.kind_color[kind]
+        if shape == 'rect':
+            pygame.draw.rect(screen, color, (x, y, w, h))
+        elif shape == 'triangle':
+            pygame.draw.polygon(screen, color, [
+                (x + w//2, y), (x, y + h), (x + w, y + h)])
+        elif shape == 'diamond':
+            pygame.draw.polygon(screen, color, [
+                (x + w//2, y), (x + w, y + h//2),
+                (x + w//2, y + h), (x, y + h//2)])
+        elif shape == 'circle':
+            pygame.draw.circle(screen, color, (x + w//2, y + h//2), w//2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=5000)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    game = game_module.Game()
+    rng = random.Random(1)
+    enemies = game.enemies
+    for _ in range(args.enemies):
+        row = enemies.spawn(rng.randrange(len(enemies.kinds)), rng)
+        enemies.y[row] = rng.randint(0, game_module.HEIGHT)
+
+    timings = {}
+    for name, draw in (("primitives", lambda: draw_primitives(game.screen, enemies)),
+                       ("sprite cache", lambda: enemies.draw(game.screen,
+                                                             game.sprites))):
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            game.screen.fill((0, 0, 0))
+            draw()
+        timings[name] = (time.perf_counter() - start) / args.frames
+        print(f"{name:12s}: {timings[name] * 1000:8.2f} ms/frame")
+    print(f"speedup: {timings['primitives'] / timings['sprite cache']:.1f}x")
+    print("cache:", game.sprites.stats())
+
+
+if __name__ == "__main__":
+    main()
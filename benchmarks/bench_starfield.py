@@ -0,0 +1,80 @@
+"""Starfield: per-star dicts and draw.rect calls vs. the array starfield.
+
+    python benchmarks/bench_starfield.py --counts 50 10000 200000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pygame
+
+from _game import load_game
+
+game_module = load_game()
+
+from starfield import Starfield  # noqa: E402
+
+
+def reference_frame(screen, stars, rng, width, height):
+    # The original update_background + draw_background, one dict at a time
+    for star in stars:
+        star['y'] += star['speed']
+        if star['y'] > height:
+            star['y'] = 0
+            star['x'] = rng.randint(0, width)
+    for star in stars:
+        size = 2 if star['speed'] > 1 else 1
+        pygame.draw.rect(screen, (255, 255, 255),
+                         (int(star['x']), int(star['y']), size, size))
+    for i in range(1, 3):
+        x = i * width // 3
+        pygame.draw.line(screen, (0, 0, 255), (x, 0), (x, height), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[50, 10000, 200000])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--reference-limit", type=int, default=20000,
+                        help="skip the per-star reference above this count")
+    parser.add_argument("--baked-above", type=int, default=4096,
+                        help="layers larger than this scroll a pre-rendered tile")
+    args = parser.parse_args()
+
+    game = game_module.Game(seed=1)
+    screen = game.screen
+    width, height = screen.get_size()
+    print(f"{'stars':>8} {'reference ms':>13} {'arrays ms':>10} {'speedup':>8}")
+    for count in args.counts:
+        reference = None
+        if count <= args.reference_limit:
+            rng = random.Random(count)
+            stars = [{'x': rng.randint(0, width), 'y': rng.randint(0, height),
+                      'speed': rng.uniform(0.5, 2)} for _ in range(count)]
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                screen.fill((0, 0, 0))
+                reference_frame(screen, stars, rng, width, height)
+            reference = (time.perf_counter() - start) / args.frames
+
+        starfield = Starfield(width, height, [(count, 0.5, 2.0)],
+                              baked_above=args.baked_above)
+        starfield.scatter(np.random.default_rng(count))
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            screen.blit(game.background, (0, 0))
+            starfield.update()
+            starfield.draw(screen, (255, 255, 255))
+        arrays = (time.perf_counter() - start) / args.frames
+
+        if reference is None:
+            print(f"{count:8d} {'-':>13} {arrays * 1000:10.3f} {'-':>8}")
+        else:
+            print(f"{count:8d} {reference * 1000:13.3f} {arrays * 1000:10.3f} "
+                  f"{reference / arrays:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
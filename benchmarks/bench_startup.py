@@ -0,0 +1,100 @@
+"""Startup cost: import time and time to the first presented frame.
+
+Each measurement runs in a fresh interpreter (--repeats times, median
+reported) so nothing is already imported or initialised:
+
+- import: loading Main-pygame1.py; must not initialise any pygame module
+- headless game: import plus a headless Game, ready to simulate
+- first frame: import, a windowed Game and its first draw and flip
+- pygame.init(): what initialising every pygame module costs, for reference
+
+Fails if the import opens a display or a median exceeds its budget.
+
+    python benchmarks/bench_startup.py --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELUDE = f"""
+import time
+start = time.perf_counter()
+import json, os, sys
+sys.path.insert(0, {ROOT!r})
+# For the pygame.init() probe; load_game sets the same drivers
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from loader import load_game
+def report(**values):
+    print(json.dumps(values))
+"""
+
+PROBES = {
+    'import': """
+game_module = load_game()
+pygame = game_module.pygame
+report(ms=(time.perf_counter() - start) * 1000,
+       initialised=bool(pygame.display.get_init() or pygame.font.get_init()
+                        or pygame.mixer.get_init()))
+""",
+    'headless game': """
+game_module = load_game()
+game = game_module.Game(headless=True, seed=1, save_path=None)
+report(ms=(time.perf_counter() - start) * 1000)
+""",
+    'first frame': """
+game_module = load_game()
+game = game_module.Game(seed=1, save_path=None)
+game.draw()
+game_module.pygame.display.flip()
+report(ms=(time.perf_counter() - start) * 1000)
+""",
+    'pygame.init()': """
+import pygame
+imported = time.perf_counter()
+pygame.init()
+report(ms=(time.perf_counter() - imported) * 1000)
+""",
+}
+
+
+def measure(probe):
+    output = subprocess.run([sys.executable, "-c", PRELUDE + probe],
+                            check=True, capture_output=True, text=True,
+                            cwd=ROOT).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1000)
+    parser.add_argument("--frame-budget-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    budgets = {'import': args.import_budget_ms,
+               'first frame': args.frame_budget_ms}
+    failures = []
+    print(f"{'stage':>14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for name, probe in PROBES.items():
+        results = [measure(probe) for _ in range(args.repeats)]
+        times = sorted(result['ms'] for result in results)
+        median = statistics.median(times)
+        print(f"{name:>14} {median:10.1f} {times[0]:8.1f} {times[-1]:8.1f}")
+        if any(result.get('initialised') for result in results):
+            failures.append("importing the game initialised pygame")
+        if name in budgets and median > budgets[name]:
+            failures.append(f"{name} took {median:.0f} ms, over "
+                            f"{budgets[name]:.0f} ms")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Regression suite: scripted scenarios timed per subsystem against baselines.
+
+Each scenario runs in its own process (the resolution is fixed per
+process), with the SDL dummy video driver: a seeded game is played with
+the scripted pilot while a hook sets up the load, and after --warmup
+frames every stage the game's FrameProfiler marks is timed for --frames
+frames of update plus draw. Results are compared with the stored
+baselines: a stage fails when its median is more than --threshold slower
+and more than --floor ms slower than its baseline (medians, because a
+single stall on a busy machine moves a mean).
+
+    python benchmarks/suite.py                      # run, compare, exit 1 on failure
+    python benchmarks/suite.py --json results.json  # also write the results
+    python benchmarks/suite.py --update-baselines   # store this run as the baseline
+
+Baselines are only meaningful on the machine that recorded them; the
+file records which one it was.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+from _game import ROOT, load_game, top_up
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'baselines.json')
+
+# game: Game() keyword arguments; setup(game) runs once, tick(game, rng)
+# before every update
+Scenario = namedtuple('Scenario', 'description resolution game setup tick')
+
+
+def _immortal(game):
+    game.player.health = game.player.max_health
+
+
+FLOOD_VOLLEY = 30
+
+
+def _flood_setup(game):
+    game.wave = 15
+    game.spawn_rate = game.balance.min_spawn_rate
+    game.spawn_weights = game.content.spawn_table(game.wave, game.balance)
+
+
+def _flood_tick(game, rng):
+    module = load_game()
+    top_up(game, module.ENTITY_CAPS['enemies'], rng)
+    # A volley from the bottom edge keeps bullets crossing the flood, and
+    # the player stays hittable, so every collision pass has work to do
+    offsets = [(rng.randrange(module.WIDTH), module.HEIGHT)
+               for _ in range(FLOOD_VOLLEY)]
+    game.bullets.fire(0, 0, np.array(offsets, dtype=np.float64),
+                      game.player.damage)
+    game.player.invulnerable = 0
+    _immortal(game)
+
+
+def _bullets_setup(game):
+    game.player.weapon_level = game.player.max_weapon_level
+    game.player.shoot_delay = 1
+
+
+def _particles_tick(game, rng):
+    module = load_game()
+    colors = list(module.COLORS.values())
+    for _ in range(20):
+        game.effects.emit(rng.randrange(module.WIDTH),
+                          rng.randrange(module.HEIGHT),
+                          rng.choice(colors), particle_count=12)
+    _immortal(game)
+
+
+def _hud_setup(game):
+    # Every HUD line and the profiler overlay are rendered every frame
+    game.profiler.overlay = True
+    game.profiler.refresh = 1
+
+
+def _hud_tick(game, rng):
+    game.score += 1
+    _immortal(game)
+
+
+def _none(game, *args):
+    _immortal(game)
+
+
+SCENARIOS = {
+    'normal_play': Scenario("scripted pilot, default load", (1024, 768),
+                            {}, _none, _none),
+    'late_wave_flood': Scenario("wave 15, enemies topped up to the cap, "
+                                "30 bullets fired per tick",
+                                (1024, 768), {}, _flood_setup, _flood_tick),
+    'bullet_spam': Scenario("top weapon level firing every tick",
+                            (1024, 768), {}, _bullets_setup, _none),
+    'particle_bursts': Scenario("20 bursts of 12 particles per tick",
+                                (1024, 768), {}, _none, _particles_tick),
+    'hud_heavy': Scenario("text cache off, score and profiler overlay "
+                          "redrawn every frame", (1024, 768),
+                          {'text_cache': False}, _hud_setup, _hud_tick),
+    'fill_1080p': Scenario("full-screen frames at 1920x1080", (1920, 1080),
+                           {}, _none, _none),
+    'fill_4k': Scenario("full-screen frames at 3840x2160", (3840, 2160),
+                        {}, _none, _none),
+}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(name, frames, warmup, seed):
+    """Play one scenario in this process; returns its timings (ms)."""
+    scenario = SCENARIOS[name]
+    module = load_game()
+    module.configure_resolution(*scenario.resolution)
+    from autopilot import make_pilot
+    from profiler import FrameProfiler
+    with warnings.catch_warnings():
+        # SDL's dummy driver has no accelerated renderer for SCALED
+        warnings.simplefilter('ignore')
+        game = module.Game(seed=seed, save_path=None, scaled=True,
+                           **scenario.game)
+    pilot = make_pilot('scripted', module.WIDTH, seed)
+    rng = random.Random(seed)
+    scenario.setup(game)
+    totals = {'update': [], 'draw': [], 'frame': []}
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            profiler = FrameProfiler(window=frames)
+            profiler.overlay = game.profiler.overlay
+            profiler.refresh = game.profiler.refresh
+            profiler.collect()
+            game.profiler = game.render_profiler = profiler
+        profiler = game.profiler
+        profiler.begin_frame()
+        scenario.tick(game, rng)
+        controls = pilot(game)
+        profiler.mark('scenario')
+        game.update(controls)
+        game.draw()
+        profiler.end_frame()
+        if frame >= warmup:
+            stages = profiler.frame
+            draw = sum(ms for stage, ms in stages.items()
+                       if stage.startswith('draw_') or stage == 'present')
+            frame_ms = stages['total'] - stages['scenario']
+            totals['update'].append(frame_ms - draw)
+            totals['draw'].append(draw)
+            totals['frame'].append(frame_ms)
+    history = dict(game.profiler.history)
+    del history['scenario'], history['total']
+    history.update(totals)
+    result = {stage: {'mean': sum(samples) / len(samples),
+                      'median': _percentile(samples, 0.5),
+                      'p99': _percentile(samples, 0.99)}
+              for stage, samples in history.items()}
+    return {'description': scenario.description,
+            'resolution': list(scenario.resolution),
+            'entities': {name: archetype.count for name, archetype
+                         in game.world.archetypes.items()},
+            'stages': result}
+
+
+def machine():
+    return {'platform': platform.platform(), 'machine': platform.machine(),
+            'processor': platform.processor(), 'cpus': os.cpu_count(),
+            'python': platform.python_version()}
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baselines, threshold, floor):
+    """Failures as (scenario, stage, baseline ms, current ms)."""
+    failures = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        for stage, timing in result['stages'].items():
+            before = baseline['stages'].get(stage)
+            if before is None:
+                continue
+            now = timing['median']
+            was = before['median']
+            if now > was * (1 + threshold) and now - was > floor:
+                failures.append((name, stage, was, now))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="allowed slowdown of a stage's median "
+                             "(0.3 = 30%%)")
+    parser.add_argument("--floor", type=float, default=0.1,
+                        help="slowdowns under this many ms never fail")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--json", metavar="FILE",
+                        help="write the results as JSON ('-' for stdout)")
+    parser.add_argument("--run", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process: one scenario, JSON on stdout
+        json.dump(run_scenario(args.run, args.frames, args.warmup, args.seed),
+                  sys.stdout)
+        return
+
+    results = {}
+    for name in args.scenarios:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', name,
+             '--frames', str(args.frames), '--warmup', str(args.warmup),
+             '--seed', str(args.seed)],
+            capture_output=True, text=True)
+        if output.returncode:
+            sys.exit(f"{name} failed:\n{output.stderr}")
+        results[name] = json.loads(output.stdout)
+        stages = results[name]['stages']
+        print(f"{name:<16} update {stages['update']['median']:7.3f} ms  "
+              f"draw {stages['draw']['median']:7.3f} ms  "
+              f"frame {stages['frame']['median']:7.3f} ms "
+              f"(p99 {stages['frame']['p99']:.3f})", file=sys.stderr)
+
+    report = {
+        'commit': commit(),
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'machine': machine(),
+        'settings': {'frames': args.frames, 'warmup': args.warmup,
+                     'seed': args.seed, 'threshold': args.threshold,
+                     'floor': args.floor},
+        'results': results,
+    }
+    failures = []
+    if args.update_baselines:
+        stored = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines, encoding='utf-8') as f:
+                stored = json.load(f)['results']
+        stored.update(results)
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump(dict(report, results=stored), f, indent=1,
+                      sort_keys=True)
+            f.write('\n')
+        print(f"baselines written to {args.baselines}", file=sys.stderr)
+    elif os.path.exists(args.baselines):
+        with open(args.baselines, encoding='utf-8') as f:
+            baselines = json.load(f)
+        if baselines.get('machine') != report['machine']:
+            print("note: the baselines were recorded on another machine",
+                  file=sys.stderr)
+        failures = compare(results, baselines['results'], args.threshold,
+                           args.floor)
+        report['baseline_commit'] = baselines.get('commit')
+        for name, stage, was, now in failures:
+            print(f"REGRESSION {name} {stage}: {was:.3f} -> {now:.3f} ms "
+                  f"({now / was - 1:+.0%})", file=sys.stderr)
+        if not failures:
+            print("no regressions against the baselines", file=sys.stderr)
+    else:
+        print(f"no baselines at {args.baselines}; run with "
+              f"--update-baselines to store them", file=sys.stderr)
+    report['failures'] = [
+        {'scenario': name, 'stage': stage, 'baseline_ms': was,
+         'current_ms': now} for name, stage, was, now in failures]
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
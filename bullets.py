@@ -0,0 +1,54 @@
+"""Player bullets: a growable archetype sharing one size and speed."""
+import numpy as np
+import pygame
+
+from ecs import DAMAGE, POSITION, PREVIOUS, VELOCITY, Archetype
+
+
+class BulletPool(Archetype):
+    def __init__(self, width, height, speed, capacity=512):
+        super().__init__((POSITION, VELOCITY, DAMAGE, PREVIOUS),
+                         capacity=capacity)
+        self.width = width
+        self.height = height
+        self.speed = speed
+        # One sprite per color; shared with snapshots, which draw instead
+        # of the pool when rendering runs on its own thread
+        self._sprites = {}
+
+    def fire(self, x, y, offsets, damage):
+        """Spawn one bullet per (dx, dy) row of ``offsets`` around (x, y)."""
+        start, end = self.allocate(len(offsets))
+        self.x[start:end] = x + offsets[:, 0]
+        self.y[start:end] = y + offsets[:, 1]
+        self.prev_x[start:end] = self.x[start:end]
+        self.prev_y[start:end] = self.y[start:end]
+        self.vx[start:end] = 0
+        self.vy[start:end] = -self.speed
+        self.damage[start:end] = damage
+
+    def cull(self):
+        # Stable compaction keeps firing order, which decides which bullet
+        # hits first when several overlap the same enemy.
+        n = self.count
+        if n:
+            y = self.y[:n]
+            if y[y.argmin()] < -10:
+                self.keep(y >= -10)
+
+    def draw(self, screen, color, rects=None, alpha=1.0):
+        n = self.count
+        if not n:
+            return
+        sprite = self._sprites.get(color)
+        if sprite is None:
+            sprite = self._sprites[color] = pygame.Surface((self.width,
+                                                            self.height))
+            sprite.fill(color)
+        x, y = self.positions(alpha)
+        drawn = screen.blits(
+            [(sprite, pos) for pos in zip(x.astype(np.int32).tolist(),
+                                          y.astype(np.int32).tolist())],
+            doreturn=rects is not None)
+        if rects is not None:
+            rects.extend(drawn)
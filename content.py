@@ -0,0 +1,154 @@
+"""Enemy, power-up, weapon and wave definitions loaded from a data file.
+
+``content.json`` is compiled once per game into flat lookup tables indexed
+by kind: sizes and speeds already scaled to the resolution, colors resolved
+from the palette and bullet patterns as arrays. Spawn weights are turned
+into a cumulative table per wave, so picking an enemy is a bisect.
+``ContentWatcher`` reloads the file when it changes on disk.
+"""
+import json
+import os
+import sys
+import time
+from bisect import bisect
+from collections import namedtuple
+from itertools import accumulate
+
+import numpy as np
+
+# Difficulty curve. enemy_weights and weight_growth hold one value per
+# enemy kind (in content order): each weight is scaled by
+# (1 + wave * growth). A wave ends at wave * wave_score points; spawns come
+# every max(min_spawn_rate, spawn_rate - wave * spawn_rate_decay) ticks and
+# spawn_rate itself drops by spawn_rate_decay every wave.
+Balance = namedtuple('Balance', 'enemy_weights weight_growth wave_score '
+                                'spawn_rate spawn_rate_decay min_spawn_rate')
+
+POWERUP_EFFECTS = ('heal', 'weapon', 'shield', 'speed')
+
+
+class ContentError(ValueError):
+    """The data file is readable JSON but doesn't describe valid content."""
+
+
+class Content:
+    def __init__(self, data, scale_factor, base_unit, palette):
+        try:
+            self._compile(data, scale_factor, base_unit, palette)
+        except (KeyError, TypeError, ValueError) as error:
+            if isinstance(error, ContentError):
+                raise
+            raise ContentError(f"invalid content: {error!r}") from error
+
+    def _compile(self, data, scale_factor, base_unit, palette):
+        enemies = data['enemies']
+        self.kinds = list(enemies)
+        self.size = [int(30 * scale_factor * enemies[kind]['size'])
+                     for kind in self.kinds]
+        self.speed = [int(enemies[kind]['speed'] * scale_factor)
+                      for kind in self.kinds]
+        self.health = [int(enemies[kind]['health']) for kind in self.kinds]
+        self.points = [int(enemies[kind]['points']) for kind in self.kinds]
+        self.color = [palette[enemies[kind]['color']] for kind in self.kinds]
+        self.shape = [enemies[kind]['shape'] for kind in self.kinds]
+        self.armored = [index for index, kind in enumerate(self.kinds)
+                        if enemies[kind].get('health_bar', False)]
+
+        powerups = data['powerups']
+        types = powerups['types']
+        self.powerup_kinds = list(types)
+        self.powerup_chance = float(powerups['chance'])
+        self.powerup_speed = int(powerups['speed'] * scale_factor)
+        self.powerup_size = base_unit // 2
+        self.powerup_color = [palette[types[kind]['color']]
+                              for kind in self.powerup_kinds]
+        self.powerup_effect = []
+        for kind in self.powerup_kinds:
+            spec = types[kind]
+            if spec['effect'] not in POWERUP_EFFECTS:
+                raise ContentError(f"power-up {kind!r}: unknown effect "
+                                   f"{spec['effect']!r}")
+            self.powerup_effect.append((spec['effect'], spec['amount'],
+                                        spec.get('duration', 0)))
+
+        self.bullet_patterns = {
+            int(level): np.array(pattern, dtype=np.float64).reshape(-1, 2)
+            for level, pattern in data['bullet_patterns'].items()}
+        self.max_weapon_level = max(self.bullet_patterns)
+        if sorted(self.bullet_patterns) != list(range(1, self.max_weapon_level + 1)):
+            raise ContentError("bullet_patterns must cover levels 1..N")
+
+        waves = data['waves']
+        self.balance = Balance(
+            enemy_weights=tuple(float(waves['enemy_weights'][kind])
+                                for kind in self.kinds),
+            weight_growth=tuple(float(waves['weight_growth'][kind])
+                                for kind in self.kinds),
+            wave_score=int(waves['wave_score']),
+            spawn_rate=int(waves['spawn_rate']),
+            spawn_rate_decay=int(waves['spawn_rate_decay']),
+            min_spawn_rate=int(waves['min_spawn_rate']))
+
+    def spawn_table(self, wave, balance):
+        """Cumulative spawn weights for ``wave``."""
+        return list(accumulate(
+            w * (1 + wave * growth)
+            for w, growth in zip(balance.enemy_weights, balance.weight_growth)))
+
+    @staticmethod
+    def pick(table, rng):
+        # Same draw as rng.choices(kinds, cum_weights=table)
+        return bisect(table, rng.random() * table[-1], 0, len(table) - 1)
+
+
+def load_content(path, scale_factor, base_unit, palette):
+    """Read and compile ``path``; returns (content, milliseconds taken)."""
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    content = Content(data, scale_factor, base_unit, palette)
+    return content, (time.perf_counter() - start) * 1000
+
+
+class ContentWatcher:
+    """Polls the data file's mtime and recompiles it when it changes."""
+
+    def __init__(self, path, scale_factor, base_unit, palette, interval=0.5):
+        self.path = path
+        self.args = (scale_factor, base_unit, palette)
+        self.interval = interval
+        self.reloads = 0
+        self.last_error = None
+        self._mtime = self._stat()
+        self._checked = time.monotonic()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        """Return newly compiled content if the file changed, else None.
+
+        A file that fails to load is reported once and the current content
+        stays in use until the next change.
+        """
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return None
+        self._checked = now
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            content, ms = load_content(self.path, *self.args)
+        except (OSError, ValueError) as error:
+            self.last_error = error
+            print(f"warning: not reloading {self.path}: {error}", file=sys.stderr)
+            return None
+        self.reloads += 1
+        self.last_error = None
+        print(f"reloaded {self.path} in {ms:.2f} ms")
+        return content
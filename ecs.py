@@ -0,0 +1,213 @@
+"""Minimal entity-component-system storage.
+
+An Archetype stores every entity of one kind as packed NumPy columns, one
+column per component field, rows 0..count-1 live. Systems are plain
+functions that process whole columns at once.
+"""
+import copy
+
+import numpy as np
+
+
+class Component:
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+
+
+POSITION = Component('position', x=np.float64, y=np.float64)
+VELOCITY = Component('velocity', vx=np.float64, vy=np.float64)
+HEALTH = Component('health', health=np.int32, max_health=np.int32)
+COLLIDER = Component('collider', width=np.int32, height=np.int32)
+DAMAGE = Component('damage', damage=np.int32)
+# Index into the archetype's own sprite/type table
+RENDERABLE = Component('renderable', sprite=np.int16)
+# life > 0 counts down and the entity expires at 0; life == 0 never expires
+LIFETIME = Component('lifetime', age=np.int32, life=np.int32)
+# Position at the start of the current tick, for interpolated drawing;
+# spawners set it equal to the spawn position
+PREVIOUS = Component('previous', prev_x=np.float64, prev_y=np.float64)
+
+
+class Archetype:
+    def __init__(self, components, capacity=256, growable=True):
+        self.components = tuple(components)
+        self.fields = {'id': np.int64}
+        for component in self.components:
+            self.fields.update(component.fields)
+        self.growable = growable
+        self.count = 0
+        self.next_id = 0
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    @property
+    def capacity(self):
+        return len(self.id)
+
+    def has(self, *components):
+        return all(component in self.components for component in components)
+
+    def __len__(self):
+        return self.count
+
+    def positions(self, alpha=1.0):
+        """x and y of the live rows, ``alpha`` of the way from the previous tick."""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        if alpha >= 1.0 or not self.has(PREVIOUS):
+            return x, y
+        prev_x = self.prev_x[:n]
+        prev_y = self.prev_y[:n]
+        return prev_x + (x - prev_x) * alpha, prev_y + (y - prev_y) * alpha
+
+    def snapshot(self):
+        """Copy holding only the live rows, safe to draw from another thread
+        while this archetype keeps changing. Non-column attributes (tables,
+        caches) are shared."""
+        frozen = copy.copy(self)
+        n = self.count
+        for name in self.fields:
+            setattr(frozen, name, getattr(self, name)[:n].copy())
+        return frozen
+
+    def dump(self):
+        """Live rows of every column as bytes, in ``fields`` order."""
+        n = self.count
+        return [getattr(self, name)[:n].tobytes() for name in self.fields]
+
+    def load(self, columns, next_id):
+        """Replace the live rows with ``columns`` as returned by ``dump``."""
+        count = len(columns[0]) // np.dtype(self.fields['id']).itemsize
+        if count > self.capacity:
+            self._grow(count)
+        for name, data in zip(self.fields, columns):
+            column = getattr(self, name)
+            column[:count] = np.frombuffer(data, dtype=column.dtype)
+        self.count = count
+        self.next_id = next_id
+
+    def _grow(self, needed):
+        capacity = max(1, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name in self.fields:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def allocate(self, count):
+        """Reserve ``count`` rows and return their (start, end) slice.
+
+        Fixed-capacity archetypes return fewer rows when full.
+        """
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            if self.growable:
+                self._grow(end)
+            else:
+                end = self.capacity
+        if end - start == 1:
+            # Single spawns are the common case; skip the temporary range
+            self.id[start] = self.next_id
+        else:
+            self.id[start:end] = np.arange(self.next_id,
+                                           self.next_id + end - start)
+        self.next_id += end - start
+        self.count = end
+        return start, end
+
+    def remove(self, indices):
+        """Remove rows, keeping the survivors in order (row order decides
+        which entity a collision finds first)."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[np.asarray(list(indices), dtype=np.intp)] = False
+        self.keep(keep)
+
+    def remove_mask(self, dead):
+        """Swap-remove rows where ``dead`` is True; faster than ``keep``
+        but the survivors' order is not preserved."""
+        n = self.count
+        dead_rows = np.flatnonzero(dead)
+        if not dead_rows.size:
+            return
+        live_count = n - dead_rows.size
+        # Fill holes below the new count with live rows taken from the tail
+        holes = dead_rows[dead_rows < live_count]
+        if holes.size:
+            movers = np.flatnonzero(~dead[live_count:]) + live_count
+            for name in self.fields:
+                column = getattr(self, name)
+                column[holes] = column[movers]
+        self.count = live_count
+
+    def keep(self, mask):
+        """Stable compaction: drop rows where ``mask`` is False."""
+        kept = int(mask.sum())
+        if kept == self.count:
+            return
+        for name in self.fields:
+            column = getattr(self, name)
+            column[:kept] = column[:self.count][mask]
+        self.count = kept
+
+    def clear(self):
+        self.count = 0
+
+
+class World:
+    def __init__(self):
+        self.archetypes = {}
+        self._queries = {}
+
+    def add(self, name, archetype):
+        self.archetypes[name] = archetype
+        self._queries.clear()
+        return archetype
+
+    def query(self, *components):
+        matches = self._queries.get(components)
+        if matches is None:
+            matches = self._queries[components] = [
+                archetype for archetype in self.archetypes.values()
+                if archetype.has(*components)]
+        return matches
+
+    def clear(self):
+        for archetype in self.archetypes.values():
+            archetype.clear()
+
+
+def remember(world):
+    # Run at the start of a tick, before anything moves
+    for archetype in world.query(POSITION, PREVIOUS):
+        n = archetype.count
+        if n:
+            archetype.prev_x[:n] = archetype.x[:n]
+            archetype.prev_y[:n] = archetype.y[:n]
+
+
+def integrate(world):
+    for archetype in world.query(POSITION, VELOCITY):
+        n = archetype.count
+        if n:
+            archetype.x[:n] += archetype.vx[:n]
+            archetype.y[:n] += archetype.vy[:n]
+
+
+def expire(world):
+    for archetype in world.query(LIFETIME):
+        n = archetype.count
+        if not n:
+            continue
+        archetype.age[:n] += 1
+        life = archetype.life[:n]
+        # Most archetypes hold only immortal rows; argmax avoids building
+        # a mask to find that out
+        if life[life.argmax()] > 0:
+            mortal = life > 0
+            life -= mortal
+            archetype.remove_mask(mortal & (life == 0))
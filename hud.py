@@ -0,0 +1,48 @@
+"""Cached text and overlay surfaces for the HUD and menu screens."""
+import time
+
+import pygame
+
+
+class TextCache:
+    """Re-renders a text slot only when its string or color changes."""
+
+    def __init__(self, font, enabled=True):
+        self.font = font
+        self.enabled = enabled
+        self.slots = {}
+        self.overlays = {}
+        self.renders = 0
+        self.surface_allocs = 0
+        self.started = time.perf_counter()
+
+    def render(self, slot, text, color):
+        entry = self.slots.get(slot)
+        if self.enabled and entry is not None and entry[0] == text and entry[1] == color:
+            return entry[2]
+        surface = self.font.render(text, True, color)
+        self.renders += 1
+        self.surface_allocs += 1
+        self.slots[slot] = (text, color, surface)
+        return surface
+
+    def overlay(self, size, color, alpha):
+        key = (size, color, alpha)
+        surface = self.overlays.get(key) if self.enabled else None
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.set_alpha(alpha)
+            surface.fill(color)
+            self.surface_allocs += 1
+            self.overlays[key] = surface
+        return surface
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            'enabled': self.enabled,
+            'font_renders': self.renders,
+            'surface_allocs': self.surface_allocs,
+            'font_renders_per_sec': self.renders / elapsed,
+            'surface_allocs_per_sec': self.surface_allocs / elapsed,
+        }
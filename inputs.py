@@ -0,0 +1,135 @@
+"""Per-frame player input and a compact binary recorder/replayer for it.
+
+Replay file layout (little endian)::
+
+    header  : b'RSRP', u8 version, u64 session seed,
+              u16 width, u16 height (the logical resolution played at),
+              u16 n, n bytes of JSON (the permanent upgrades applied)
+    records : u8 tag [+ i16 mouse_x] [+ u16 repeat]
+
+Tag bits 0-2 hold left/right/mouse_down, bit 3 means a new mouse_x
+follows, bit 4 means a repeat count follows (the same input held for
+several frames) and 0x80 alone marks a game reset.
+"""
+import json
+import struct
+from collections import namedtuple
+
+Controls = namedtuple('Controls', 'left right mouse_down mouse_x')
+IDLE_CONTROLS = Controls(False, False, False, 0)
+
+# Sentinel yielded by InputReplay where the recorded session restarted
+RESET = object()
+
+MAGIC = b'RSRP'
+VERSION = 3
+_HEADER = struct.Struct('<4sBQHHH')
+_VERSION = struct.Struct('<4sB')
+_MOUSE = struct.Struct('<h')
+_REPEAT = struct.Struct('<H')
+
+_LEFT = 0x01
+_RIGHT = 0x02
+_MOUSE_DOWN = 0x04
+_MOUSE_X = 0x08
+_REPEATED = 0x10
+_RESET = 0x80
+_MAX_REPEAT = 0xFFFF
+
+
+def _normalize(controls):
+    # The mouse position only matters while the button is held
+    if controls.mouse_down:
+        return Controls(bool(controls.left), bool(controls.right), True,
+                        int(controls.mouse_x))
+    return Controls(bool(controls.left), bool(controls.right), False, 0)
+
+
+class InputRecorder:
+    def __init__(self, path, seed, resolution, upgrades,
+                 buffer_size=64 * 1024):
+        # Sizes and speeds scale with the resolution and upgrades change
+        # the player, so a replay has to run with the same of both
+        upgrades = json.dumps(upgrades, separators=(',', ':')).encode()
+        self.file = open(path, 'wb', buffering=buffer_size)
+        self.file.write(_HEADER.pack(MAGIC, VERSION, seed, *resolution,
+                                     len(upgrades)) + upgrades)
+        self.frames = 0
+        self._pending = None
+        self._count = 0
+        self._mouse_x = 0
+
+    def record(self, controls):
+        controls = _normalize(controls)
+        self.frames += 1
+        if controls == self._pending and self._count < _MAX_REPEAT:
+            self._count += 1
+            return
+        self._flush()
+        self._pending = controls
+        self._count = 1
+
+    def mark_reset(self):
+        self._flush()
+        self.file.write(bytes((_RESET,)))
+
+    def _flush(self):
+        controls = self._pending
+        if controls is None:
+            return
+        tag = ((_LEFT if controls.left else 0)
+               | (_RIGHT if controls.right else 0)
+               | (_MOUSE_DOWN if controls.mouse_down else 0))
+        payload = b''
+        if controls.mouse_down and controls.mouse_x != self._mouse_x:
+            tag |= _MOUSE_X
+            payload += _MOUSE.pack(controls.mouse_x)
+            self._mouse_x = controls.mouse_x
+        if self._count > 1:
+            tag |= _REPEATED
+            payload += _REPEAT.pack(self._count)
+        self.file.write(bytes((tag,)) + payload)
+        self._pending = None
+        self._count = 0
+
+    def close(self):
+        self._flush()
+        self.file.close()
+
+
+class InputReplay:
+    """Iterates recorded Controls (and RESET markers) in recorded order."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version = _VERSION.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        _, _, self.seed, width, height, size = _HEADER.unpack_from(self.data)
+        self.resolution = (width, height)
+        self._start = _HEADER.size + size
+        self.upgrades = json.loads(self.data[_HEADER.size:self._start])
+
+    def __iter__(self):
+        data = self.data
+        pos = self._start
+        mouse_x = 0
+        while pos < len(data):
+            tag = data[pos]
+            pos += 1
+            if tag == _RESET:
+                yield RESET
+                continue
+            if tag & _MOUSE_X:
+                mouse_x, = _MOUSE.unpack_from(data, pos)
+                pos += _MOUSE.size
+            count = 1
+            if tag & _REPEATED:
+                count, = _REPEAT.unpack_from(data, pos)
+                pos += _REPEAT.size
+            mouse_down = bool(tag & _MOUSE_DOWN)
+            controls = Controls(bool(tag & _LEFT), bool(tag & _RIGHT),
+                                mouse_down, mouse_x if mouse_down else 0)
+            for _ in range(count):
+                yield controls
@@ -0,0 +1,76 @@
+"""Entity lifecycles: despawn what leaves the play area, cap populations.
+
+Entities that fall or drift out of the screen by more than ``margin``
+pixels are removed, so a long session doesn't keep moving, drawing and
+collision-testing objects nobody can see. Spawners ask ``full(name)``
+before adding to a capped archetype. Counters per archetype: live rows,
+peak, total spawned (the archetype's id counter), culled and spawns
+refused by the cap.
+"""
+import numpy as np
+
+from ecs import COLLIDER
+
+
+class Lifecycle:
+    def __init__(self, width, height, margin):
+        # margin=None keeps everything (the old, unbounded behaviour)
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.tracked = {}
+
+    def track(self, name, archetype, cap=None, cull=True):
+        """Manage ``archetype``; cull=False only counts it (it has its own
+        despawn rule)."""
+        self.tracked[name] = {'archetype': archetype, 'cap': cap,
+                              'cull': cull, 'peak': 0, 'culled': 0,
+                              'capped': 0}
+
+    def full(self, name):
+        """True (and counted) if ``name`` is at its cap."""
+        entry = self.tracked[name]
+        cap = entry['cap']
+        if cap is not None and entry['archetype'].count >= cap:
+            entry['capped'] += 1
+            return True
+        return False
+
+    def cull(self):
+        margin = self.margin
+        for entry in self.tracked.values():
+            archetype = entry['archetype']
+            n = archetype.count
+            entry['peak'] = max(entry['peak'], n)
+            if not n or margin is None or not entry['cull']:
+                continue
+            x = archetype.x[:n]
+            y = archetype.y[:n]
+            # Nothing can be out unless an edge row is (rows are at least
+            # as far left/up as their far edge); checked without masks
+            if not (y[y.argmax()] > self.height + margin
+                    or y[y.argmin()] < -margin
+                    or x[x.argmax()] > self.width + margin
+                    or x[x.argmin()] < -margin):
+                continue
+            if archetype.has(COLLIDER):
+                w = archetype.width[:n]
+                h = archetype.height[:n]
+            else:
+                w = archetype.width
+                h = archetype.height
+            gone = ((y > self.height + margin) | (y + h < -margin)
+                    | (x > self.width + margin) | (x + w < -margin))
+            if gone.any():
+                # Stable, like bullets: row order decides which enemy a
+                # bullet hits first, so culling never changes a collision
+                archetype.keep(~gone)
+                entry['culled'] += int(np.count_nonzero(gone))
+
+    def stats(self):
+        return {name: {'live': entry['archetype'].count,
+                       'peak': entry['peak'],
+                       'spawned': entry['archetype'].next_id,
+                       'culled': entry['culled'],
+                       'capped': entry['capped']}
+                for name, entry in self.tracked.items()}
@@ -0,0 +1,27 @@
+"""Import Main-pygame1.py (not a valid module name) as ``main_pygame1``.
+
+Used by the tools that drive the game from outside, balance.py and the
+benchmarks, with SDL's dummy drivers so no window or audio device opens.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_game():
+    """Import Main-pygame1.py as a module, using the SDL dummy drivers."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if "main_pygame1" in sys.modules:
+        return sys.modules["main_pygame1"]
+    spec = importlib.util.spec_from_file_location(
+        "main_pygame1", os.path.join(ROOT, "Main-pygame1.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["main_pygame1"] = module
+    spec.loader.exec_module(module)
+    return module
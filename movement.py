@@ -0,0 +1,64 @@
+"""Table-driven sideways movement patterns for enemies.
+
+A pattern is data: ``dx(age) = amplitude * wave(frequency * age)`` with
+``wave`` being sin or cos. Each registered pattern gets a row of
+precomputed offsets indexed by age, so advancing every enemy is a single
+gather from the table.
+"""
+import numpy as np
+
+WAVES = {'sin': np.sin, 'cos': np.cos}
+
+
+class MovementPatterns:
+    def __init__(self, table_frames=4096):
+        self.table_frames = table_frames
+        self.names = []
+        self.params = []
+        self.table = np.zeros((0, table_frames), dtype=np.float64)
+        # Reused gather buffers, grown to the largest batch seen
+        self._index = np.zeros(0, dtype=np.intp)
+        self._gathered = np.zeros(0, dtype=np.float64)
+
+    def register(self, name, amplitude=0.0, frequency=0.0, wave='sin'):
+        if name in self.names:
+            raise ValueError(f"movement pattern {name!r} already registered")
+        row = self._offsets(amplitude, frequency, wave,
+                            np.arange(self.table_frames))
+        self.table = np.vstack([self.table, row])
+        self._flat = self.table.reshape(-1)
+        self.names.append(name)
+        self.params.append((amplitude, frequency, wave))
+        return len(self.names) - 1
+
+    @staticmethod
+    def _offsets(amplitude, frequency, wave, age):
+        return WAVES[wave](age * frequency) * amplitude
+
+    def advance(self, x, pattern, age):
+        """Add each entity's offset for its current ``age`` to ``x`` in place."""
+        limit = self.table_frames
+        n = len(age)
+        if not n:
+            return
+        # argmax, unlike max, doesn't allocate a reduction buffer; the gather
+        # goes through reused buffers
+        if age[age.argmax()] < limit:
+            if len(self._index) < n:
+                self._index = np.zeros(n * 2, dtype=np.intp)
+                self._gathered = np.zeros(n * 2, dtype=np.float64)
+            index = self._index[:n]
+            gathered = self._gathered[:n]
+            # Row-major position of (pattern, age) in the table
+            index[:] = pattern
+            index *= limit
+            index += age
+            self._flat.take(index, out=gathered)
+            np.add(x, gathered, out=x)
+            return
+        # Entities older than the table fall back to evaluating the wave
+        young = age < limit
+        x[young] += self.table[pattern[young], age[young]]
+        for index in np.unique(pattern[~young]).tolist():
+            old = ~young & (pattern == index)
+            x[old] += self._offsets(*self.params[index], age[old])
@@ -0,0 +1,75 @@
+"""Shared particle pool: a fixed-capacity archetype of short-lived squares."""
+import math
+
+import numpy as np
+import pygame
+
+from ecs import (LIFETIME, POSITION, PREVIOUS, RENDERABLE, VELOCITY,
+                 Archetype)
+
+
+class ParticlePool(Archetype):
+    def __init__(self, capacity=4096, pixel_size=4, rng=None):
+        super().__init__((POSITION, VELOCITY, LIFETIME, RENDERABLE, PREVIOUS),
+                         capacity=capacity, growable=False)
+        self.pixel_size = pixel_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.peak = 0
+        self.dropped = 0
+        # Palette of particle colors and one pre-rendered square per color
+        self.palette = []
+        self._color_index = {}
+        self._sprites = []
+
+    def _palette_index(self, color):
+        index = self._color_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self._color_index[color] = index
+            sprite = pygame.Surface((self.pixel_size, self.pixel_size))
+            sprite.fill(color)
+            self._sprites.append(sprite)
+        return index
+
+    def emit(self, x, y, color, particle_count=8):
+        start, end = self.allocate(particle_count)
+        self.dropped += particle_count - (end - start)
+        count = end - start
+        if count <= 0:
+            return
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        speed = self.rng.uniform(2, 5, count)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.prev_x[start:end] = x
+        self.prev_y[start:end] = y
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.age[start:end] = 0
+        self.life[start:end] = self.rng.integers(10, 21, count)
+        self.sprite[start:end] = self._palette_index(color)
+        self.peak = max(self.peak, end)
+
+    def draw(self, screen, rects=None, alpha=1.0):
+        n = self.count
+        if not n:
+            return
+        sprites = self._sprites
+        xs, ys = self.positions(alpha)
+        drawn = screen.blits(
+            [(sprites[c], (x, y)) for c, x, y in zip(
+                self.sprite[:n].tolist(),
+                xs.astype(np.int32).tolist(),
+                ys.astype(np.int32).tolist())],
+            doreturn=rects is not None)
+        if rects is not None:
+            rects.extend(drawn)
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'live': self.count,
+            'peak': self.peak,
+            'dropped': self.dropped,
+        }
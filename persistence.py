@@ -0,0 +1,174 @@
+"""Save-game persistence that never blocks the game loop.
+
+The save is a small JSON document::
+
+    {"version": 1,
+     "high_score": 1200,
+     "scores": [{"score": 1200, "wave": 3, "seed": 42, "time": 1700000000}],
+     "waves": {"1": {"reached": 5, "frames": 9000, "kills": 40,
+                     "damage_taken": 60}},
+     "upgrades": {"Health": 1, "Damage": 0, "Split Shot": 0}}
+
+The game thread only edits the in-memory copy and queues a snapshot; a
+daemon thread writes the newest queued snapshot to a temporary file in the
+same directory and renames it over the save, so a crash mid-write leaves
+the previous save intact.
+"""
+import copy
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+VERSION = 1
+MAX_SCORES = 10
+
+
+def empty_save():
+    return {'version': VERSION, 'high_score': 0, 'scores': [], 'waves': {},
+            'upgrades': {}}
+
+
+class SaveService:
+    def __init__(self, path, legacy_path=None, max_scores=MAX_SCORES):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.max_scores = max_scores
+        self.writes = 0
+        self.failures = 0
+        self.last_error = None
+        self.data = self.load()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name='saves',
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def high_score(self):
+        return self.data['high_score']
+
+    @property
+    def upgrades(self):
+        return self.data['upgrades']
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self._migrate()
+        except (OSError, ValueError) as error:
+            self._warn(f"could not read {self.path}: {error}")
+            return self._migrate()
+        save = empty_save()
+        if isinstance(data, dict):
+            save.update((key, data[key]) for key in save
+                        if key in data and key != 'version')
+        return save
+
+    def _migrate(self):
+        # Older builds kept only the high score, as plain text
+        save = empty_save()
+        if self.legacy_path is None:
+            return save
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                save['high_score'] = int(f.read())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as error:
+            self._warn(f"could not read {self.legacy_path}: {error}")
+        return save
+
+    def record_game(self, score, wave, seed=None, wave_stats=()):
+        """Fold a finished game into the save and queue a write."""
+        data = self.data
+        data['high_score'] = max(data['high_score'], score)
+        data['scores'].append({'score': score, 'wave': wave, 'seed': seed,
+                               'time': int(time.time())})
+        data['scores'].sort(key=lambda entry: entry['score'], reverse=True)
+        del data['scores'][self.max_scores:]
+        for stats in wave_stats:
+            totals = data['waves'].setdefault(str(stats['wave']), {})
+            totals['reached'] = totals.get('reached', 0) + 1
+            for key, value in stats.items():
+                if key != 'wave':
+                    totals[key] = totals.get(key, 0) + value
+        self.save()
+
+    def save(self):
+        self._queue.put(copy.deepcopy(self.data))
+
+    def flush(self, timeout=None):
+        """Wait until every queued snapshot has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout=5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _worker(self):
+        stop = False
+        while not stop:
+            snapshot = self._queue.get()
+            done = 1
+            # Only the newest snapshot matters; skip any that piled up
+            # behind a slow write. None asks the thread to finish.
+            while True:
+                try:
+                    newer = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                done += 1
+                if newer is None:
+                    stop = True
+                else:
+                    snapshot = newer
+            if snapshot is None:
+                stop = True
+            else:
+                try:
+                    self._write(snapshot)
+                    self.writes += 1
+                except OSError as error:
+                    self.failures += 1
+                    self.last_error = error
+                    self._warn(f"could not write {self.path}: {error}")
+            for _ in range(done):
+                self._queue.task_done()
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.save-', suffix='.tmp',
+                                         dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _warn(message):
+        print(f"warning: {message}", file=sys.stderr)
+
+    def stats(self):
+        return {
+            'writes': self.writes,
+            'failures': self.failures,
+            'pending': self._queue.unfinished_tasks,
+        }
@@ -0,0 +1,122 @@
+"""Pipelined rendering: the game thread simulates, a render thread draws.
+
+After its ticks the game thread captures an immutable frame (copies of
+everything drawing needs) and submits it; a daemon thread draws and
+presents it while the next ticks run. pygame releases the GIL inside
+blits, fills and flips, so the two overlap.
+
+Frames in flight are bounded by ``depth``: one being drawn plus up to
+``depth - 1`` waiting (2 = double buffering, 3 = triple). ``submit``
+blocks while the buffer is full, so the screen is never more than that
+many frames behind the simulation. Latency is measured per frame from
+capture to the end of its present.
+"""
+import sys
+import threading
+import time
+from collections import deque
+
+MAX_DEPTH = 3
+
+
+class RenderPipeline:
+    def __init__(self, render, depth=2, window=300):
+        # render(frame) draws and presents one captured frame
+        if not 2 <= depth <= MAX_DEPTH:
+            raise ValueError(f"pipeline depth must be 2..{MAX_DEPTH}, got {depth}")
+        self.render = render
+        self.depth = depth
+        self.rendered = 0
+        self.stalls = 0
+        self.error = None
+        self.latencies = deque(maxlen=window)
+        self.waits = deque(maxlen=window)
+        self._frames = deque()
+        self._busy = False
+        self._stop = False
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name='render',
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """Queue ``frame`` (which must have a ``created`` time) for drawing.
+
+        Returns False if the render thread has failed; the caller should
+        fall back to drawing on its own thread.
+        """
+        with self._ready:
+            if len(self._frames) >= self.depth - 1:
+                self.stalls += 1
+                self._ready.wait_for(lambda: len(self._frames) < self.depth - 1
+                                     or self.error is not None)
+            if self.error is not None:
+                return False
+            self._frames.append(frame)
+            self._ready.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every submitted frame is on screen and the render
+        thread is idle (before drawing from the calling thread)."""
+        with self._ready:
+            return self._ready.wait_for(
+                lambda: (not self._frames and not self._busy)
+                or self.error is not None, timeout)
+
+    def close(self, timeout=5.0):
+        with self._ready:
+            self._stop = True
+            self._ready.notify_all()
+        self._thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            with self._ready:
+                self._ready.wait_for(lambda: self._frames or self._stop)
+                if not self._frames:
+                    return
+                frame = self._frames.popleft()
+                self._busy = True
+                self._ready.notify_all()
+            started = time.perf_counter()
+            try:
+                self.render(frame)
+            except Exception as error:
+                print(f"warning: render thread failed: {error!r}",
+                      file=sys.stderr)
+                with self._ready:
+                    self.error = error
+                    self._frames.clear()
+                    self._busy = False
+                    self._ready.notify_all()
+                return
+            done = time.perf_counter()
+            with self._ready:
+                self.waits.append(started - frame.created)
+                self.latencies.append(done - frame.created)
+                self.rendered += 1
+                self._busy = False
+                self._ready.notify_all()
+
+    def stats(self):
+        def ms(samples):
+            ordered = sorted(samples)
+            if not ordered:
+                return 0.0, 0.0
+            return (sum(ordered) / len(ordered) * 1000,
+                    ordered[int(len(ordered) * 0.99)] * 1000)
+
+        with self._ready:
+            latencies = list(self.latencies)
+            waits = list(self.waits)
+        latency, latency_p99 = ms(latencies)
+        wait, _ = ms(waits)
+        return {
+            'depth': self.depth,
+            'rendered': self.rendered,
+            'stalls': self.stalls,
+            'latency_ms': latency,
+            'latency_p99_ms': latency_p99,
+            'queue_wait_ms': wait,
+        }
@@ -0,0 +1,147 @@
+"""Per-frame stage timings with rolling averages, p99 and an optional log.
+
+With allocation tracking on, every frame also records ``alloc_kb`` (memory
+allocated and released again within the frame, from tracemalloc's peak)
+and ``gc_runs`` (garbage collections started, from gc.get_stats()).
+"""
+import csv
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+
+class FrameProfiler:
+    def __init__(self, window=300, refresh=15):
+        self.enabled = False
+        self.overlay = False
+        self.window = window
+        self.refresh = refresh
+        self.history = {}
+        self.frame = {}
+        self.frames = 0
+        self.lines = []
+        self._last = 0.0
+        self._start = 0.0
+        self._log = None
+        # CSV logs: rows are spooled as JSON lines and written out on close,
+        # when every stage that ever ran (the columns) is known
+        self._spool = None
+        self._columns = None
+        self.allocations = False
+        self._traced = 0
+        self._collections = 0
+
+    def toggle(self):
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self.allocations or self._log is not None
+
+    def collect(self):
+        # Timings only, with no overlay or log (benchmarks read summary())
+        self.enabled = True
+
+    def track_allocations(self):
+        # tracemalloc slows every allocation down, so this is opt-in
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.allocations = True
+        self.enabled = True
+
+    @staticmethod
+    def _gc_runs():
+        return sum(stats['collections'] for stats in gc.get_stats())
+
+    def open_log(self, path):
+        # JSON lines by default, CSV when the file name ends in .csv
+        self._log = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self._spool = tempfile.TemporaryFile('w+')
+            self._columns = {'frame': None}
+        self.enabled = True
+
+    def close(self):
+        if self._log:
+            if self._spool:
+                self._write_csv()
+            self._log.close()
+            self._log = None
+        if self.allocations:
+            tracemalloc.stop()
+            self.allocations = False
+        self.enabled = self.overlay
+
+    def begin_frame(self):
+        if self.enabled:
+            if self.allocations:
+                self._traced, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self._collections = self._gc_runs()
+            self._start = self._last = time.perf_counter()
+            self.frame = {}
+
+    def mark(self, stage):
+        # Charges the time since the previous mark to ``stage``
+        if self.enabled:
+            now = time.perf_counter()
+            self.frame[stage] = self.frame.get(stage, 0.0) + (now - self._last) * 1000
+            self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        frame = self.frame
+        frame['total'] = (time.perf_counter() - self._start) * 1000
+        if self.allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            frame['alloc_kb'] = (peak - self._traced) / 1024
+            frame['gc_runs'] = self._gc_runs() - self._collections
+        for stage, ms in frame.items():
+            samples = self.history.get(stage)
+            if samples is None:
+                samples = self.history[stage] = deque(maxlen=self.window)
+            samples.append(ms)
+        self.frames += 1
+        if self._log:
+            self._write(frame)
+        if self.overlay and self.frames % self.refresh == 0:
+            self.lines = [f"{stage:<14}{avg:7.2f} avg {p99:7.2f} p99"
+                          for stage, (avg, p99) in self.summary().items()]
+
+    def _write(self, frame):
+        row = {'frame': self.frames}
+        row.update((stage, round(ms, 4)) for stage, ms in frame.items())
+        if self._spool:
+            self._columns.update(dict.fromkeys(row))
+            self._spool.write(json.dumps(row) + '\n')
+        else:
+            self._log.write(json.dumps(row) + '\n')
+
+    def _write_csv(self):
+        # Stages missing from a frame (no tick ran, overlay off) stay empty
+        writer = csv.DictWriter(self._log, fieldnames=list(self._columns),
+                                restval='')
+        writer.writeheader()
+        self._spool.seek(0)
+        for line in self._spool:
+            writer.writerow(json.loads(line))
+        self._spool.close()
+        self._spool = self._columns = None
+
+    def summary(self):
+        result = {}
+        for stage, samples in self.history.items():
+            ordered = sorted(samples)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            result[stage] = (sum(ordered) / len(ordered), p99)
+        return result
+
+    def draw(self, screen, text, color, position):
+        rects = []
+        x, y = position
+        for index, line in enumerate(self.lines):
+            surface = text.render(('profiler', index), line, color)
+            rects.append(screen.blit(surface, (x, y)))
+            y += surface.get_height()
+        return rects
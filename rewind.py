@@ -0,0 +1,241 @@
+"""Save-states and a rewind buffer for the whole simulation.
+
+A state is a list of byte sections: one JSON section (player, wave
+counters, per-wave stats, the particle RNG and scroll offsets), the
+gameplay RNG's Mersenne Twister words, then the live rows of every column
+of enemies (including their movement pattern and age), power-ups,
+bullets and particles, and the per-star starfield arrays. Restoring one
+puts a game back exactly, so it plays on identically from there.
+
+Save-states are that list packed and zlib-compressed::
+
+    MAGIC, u8 version, u32 n, n x u32 section length, sections
+
+The rewind buffer keeps the newest state whole and every older one as a
+backward delta: the older state XOR the newer one, section by section
+(sections that shrank or grew are XORed over their common prefix), then
+zlib. Most bytes are unchanged from one tick to the next, so a delta is
+mostly zeros and compresses well; and since nothing depends on the
+oldest entry it can be dropped for free when the buffer is full.
+
+Baked starfield layers are generated once per game and are not part of
+the state.
+"""
+import json
+import struct
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+MAGIC = b'RSRS'
+VERSION = 1
+_HEADER = struct.Struct('<4sBI')
+_COUNT = struct.Struct('<I')
+# random.Random state: 624 Mersenne Twister words and the position in them
+_WORDS = struct.Struct('<625I')
+
+PLAYER_FIELDS = ('x', 'y', 'prev_x', 'prev_y', 'speed', 'base_speed',
+                 'health', 'max_health', 'shield', 'max_shield', 'damage',
+                 'score', 'currency', 'weapon_level', 'shoot_timer',
+                 'shoot_delay', 'invulnerable', 'speed_boost_timer')
+GAME_FIELDS = ('score', 'wave', 'wave_timer', 'spawn_rate', 'game_over')
+ARCHETYPES = ('enemies', 'powerups', 'bullets', 'particles')
+
+
+def _plain(value):
+    # NumPy scalars (entity fields copied onto the player) to JSON numbers
+    return value.item()
+
+
+def capture(game):
+    """The game's full simulation state as a list of byte sections."""
+    player = game.player
+    starfield = game.starfield
+    _, words, gauss = game.rng.getstate()
+    archetypes = [game.world.archetypes[name] for name in ARCHETYPES]
+    state = {
+        'player': {name: getattr(player, name) for name in PLAYER_FIELDS},
+        'game': {name: getattr(game, name) for name in GAME_FIELDS},
+        'wave_stats': game.wave_stats,
+        'gauss': gauss,
+        'fx_rng': game.fx_rng.bit_generator.state,
+        'offsets': starfield.offsets,
+        'next_ids': [archetype.next_id for archetype in archetypes],
+    }
+    sections = [json.dumps(state, separators=(',', ':'),
+                           default=_plain).encode(),
+                _WORDS.pack(*words)]
+    for archetype in archetypes:
+        sections.extend(archetype.dump())
+    sections.extend((starfield.x.tobytes(), starfield.y.tobytes(),
+                     starfield.speed.tobytes()))
+    return sections
+
+
+def restore(game, sections):
+    """Put ``game`` back into a state returned by ``capture``."""
+    state = json.loads(sections[0])
+    player = game.player
+    for name, value in state['player'].items():
+        setattr(player, name, value)
+    for name, value in state['game'].items():
+        setattr(game, name, value)
+    game.wave_stats = state['wave_stats']
+    game.spawn_weights = game.content.spawn_table(game.wave, game.balance)
+    game.rng.setstate((3, _WORDS.unpack(sections[1]), state['gauss']))
+    # The particle pool and the starfield share this generator
+    game.fx_rng.bit_generator.state = state['fx_rng']
+    pos = 2
+    for name, next_id in zip(ARCHETYPES, state['next_ids']):
+        archetype = game.world.archetypes[name]
+        end = pos + len(archetype.fields)
+        archetype.load(sections[pos:end], next_id)
+        pos = end
+    starfield = game.starfield
+    for name in ('x', 'y', 'speed'):
+        getattr(starfield, name)[:] = np.frombuffer(sections[pos],
+                                                   dtype=np.float64)
+        pos += 1
+    starfield.offsets = state['offsets']
+
+
+def pack(sections):
+    """Save-state bytes for a list of sections."""
+    return zlib.compress(
+        _HEADER.pack(MAGIC, VERSION, len(sections))
+        + b''.join(_COUNT.pack(len(section)) for section in sections)
+        + b''.join(sections))
+
+
+def unpack(data):
+    data = zlib.decompress(data)
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a save-state")
+    lengths = np.frombuffer(data, dtype='<u4', count=count,
+                            offset=_HEADER.size).tolist()
+    return _split(data, _HEADER.size + _COUNT.size * count, lengths)
+
+
+def save_state(game):
+    return pack(capture(game))
+
+
+def load_state(game, data):
+    restore(game, unpack(data))
+
+
+def _split(blob, pos, lengths):
+    sections = []
+    for length in lengths:
+        sections.append(blob[pos:pos + length])
+        pos += length
+    return sections
+
+
+def _aligned(sections, lengths):
+    # ``sections`` cut or zero-padded to ``lengths``, joined
+    return b''.join(section[:length].ljust(length, b'\0')
+                    for section, length in zip(sections, lengths))
+
+
+def _xor(a, b):
+    return np.bitwise_xor(np.frombuffer(a, dtype=np.uint8),
+                          np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+
+def encode_delta(older, newer):
+    """``older`` as a compressed delta against ``newer``."""
+    lengths = [len(section) for section in older]
+    header = (_COUNT.pack(len(lengths))
+              + np.array(lengths, dtype='<u4').tobytes())
+    return header + zlib.compress(
+        _xor(b''.join(older), _aligned(newer, lengths)), 1)
+
+
+def decode_delta(newer, delta):
+    """The older state that ``delta`` was encoded from."""
+    count, = _COUNT.unpack_from(delta)
+    lengths = np.frombuffer(delta, dtype='<u4', count=count,
+                            offset=_COUNT.size).tolist()
+    body = zlib.decompress(delta[_COUNT.size * (count + 1):])
+    return _split(_xor(body, _aligned(newer, lengths)), 0, lengths)
+
+
+class RewindBuffer:
+    """The last ``frames`` states of a game, in at most ``max_bytes``.
+
+    ``record(game)`` once per tick; ``rewind(game, frames)`` steps back
+    and restores, discarding the newer states.
+    """
+
+    def __init__(self, frames, max_bytes=16 * 1024 * 1024, window=600):
+        self.frames = frames
+        self.max_bytes = max_bytes
+        self.delta_bytes = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.capture_times = deque(maxlen=window)
+        self._deltas = deque()
+        self._latest = None
+        self._latest_bytes = 0
+
+    def __len__(self):
+        return len(self._deltas) + (self._latest is not None)
+
+    @property
+    def bytes(self):
+        return self.delta_bytes + self._latest_bytes
+
+    def record(self, game):
+        start = time.perf_counter()
+        sections = capture(game)
+        if self._latest is not None:
+            delta = encode_delta(self._latest, sections)
+            self._deltas.append(delta)
+            self.delta_bytes += len(delta)
+        self._latest = sections
+        self._latest_bytes = sum(len(section) for section in sections)
+        deltas = self._deltas
+        while deltas and (len(deltas) >= self.frames
+                          or self.bytes > self.max_bytes):
+            self.delta_bytes -= len(deltas.popleft())
+            self.dropped += 1
+        self.recorded += 1
+        self.capture_times.append(time.perf_counter() - start)
+
+    def rewind(self, game, frames=1):
+        """Restore the state ``frames`` ticks back (or the oldest held);
+        returns how many ticks were rewound."""
+        if self._latest is None:
+            return 0
+        steps = min(frames, len(self._deltas))
+        sections = self._latest
+        for _ in range(steps):
+            delta = self._deltas.pop()
+            self.delta_bytes -= len(delta)
+            sections = decode_delta(sections, delta)
+        self._latest = sections
+        self._latest_bytes = sum(len(section) for section in sections)
+        restore(game, sections)
+        return steps
+
+    def clear(self):
+        self._deltas.clear()
+        self._latest = None
+        self.delta_bytes = self._latest_bytes = 0
+
+    def stats(self):
+        times = sorted(self.capture_times)
+        deltas = len(self._deltas)
+        return {
+            'frames': len(self),
+            'kb': self.bytes / 1024,
+            'delta_bytes': self.delta_bytes / deltas if deltas else 0.0,
+            'state_bytes': self._latest_bytes,
+            'capture_ms': sum(times) / len(times) * 1000 if times else 0.0,
+            'capture_p99_ms': times[int(len(times) * 0.99)] * 1000 if times else 0.0,
+            'dropped': self.dropped,
+        }
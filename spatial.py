@@ -0,0 +1,140 @@
+"""Broad-phase collision structures.
+
+Every broad phase shares the same interface: ``build(rects)`` indexes a list
+of ``(x, y, width, height)`` rects by position, and ``query(x, y, w, h)``
+returns the sorted indices of rects that *may* overlap the query area.
+Callers still run the exact AABB test on the candidates, so swapping the
+broad phase never changes collision results.
+"""
+from bisect import bisect_left, bisect_right
+
+
+def rects_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    return ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by
+
+
+class BruteForce:
+    """Reference broad phase: every rect is a candidate."""
+
+    def __init__(self):
+        self.count = 0
+
+    def build(self, rects):
+        self.count = len(rects)
+
+    def query(self, x, y, w, h):
+        return range(self.count)
+
+
+class SpatialGrid:
+    """Uniform bucket grid, refilled every frame.
+
+    Bucket lists are emptied and reused rather than rebuilt, so a steady
+    population re-indexes without allocating new lists or dict entries.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}
+        self._filled = []
+
+    def build(self, rects):
+        cells = self.cells
+        filled = self._filled
+        for bucket in filled:
+            bucket.clear()
+        filled.clear()
+        size = self.cell_size
+        for index, (x, y, w, h) in enumerate(rects):
+            x0 = int(x // size)
+            x1 = int((x + w) // size)
+            y0 = int(y // size)
+            y1 = int((y + h) // size)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket is None:
+                        bucket = cells[(cx, cy)] = []
+                    if not bucket:
+                        filled.append(bucket)
+                    bucket.append(index)
+        # Entities drifting off into new cells would otherwise grow the
+        # dict forever; drop the empty buckets once they dominate
+        if len(cells) > 2 * len(filled) + 1024:
+            self.cells = {key: bucket for key, bucket in cells.items()
+                          if bucket}
+
+    def query(self, x, y, w, h):
+        size = self.cell_size
+        cells = self.cells
+        x0 = int(x // size)
+        x1 = int((x + w) // size)
+        y0 = int(y // size)
+        y1 = int((y + h) // size)
+        if x0 == x1 and y0 == y1:
+            return cells.get((x0, y0), ())
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
+
+
+class SweepAndPrune:
+    """Rects sorted by their top edge; a query bisects to the band of rects
+    that can reach its rows and checks only those.
+
+    Unlike the grid, no cell size has to suit both bullets and bosses: the
+    band is only as tall as the query plus the tallest indexed rect, and
+    entities in a vertical shooter are spread out along y.
+    """
+
+    def __init__(self):
+        self.tops = []
+        self.bottoms = []
+        self.lefts = []
+        self.rights = []
+        self.order = []
+        self.max_height = 0
+
+    def build(self, rects):
+        order = sorted(range(len(rects)), key=lambda index: rects[index][1])
+        ordered = [rects[index] for index in order]
+        self.order = order
+        self.tops = [y for _, y, _, _ in ordered]
+        self.bottoms = [y + h for _, y, _, h in ordered]
+        self.lefts = [x for x, _, _, _ in ordered]
+        self.rights = [x + w for x, _, w, _ in ordered]
+        self.max_height = max((h for _, _, _, h in ordered), default=0)
+
+    def query(self, x, y, w, h):
+        tops = self.tops
+        # Anything starting above y - max_height ends above y
+        start = bisect_right(tops, y - self.max_height)
+        end = bisect_left(tops, y + h, start)
+        if start == end:
+            return ()
+        right = x + w
+        found = [index for index, bottom, left, rect_right in zip(
+                     self.order[start:end], self.bottoms[start:end],
+                     self.lefts[start:end], self.rights[start:end])
+                 if left < right and rect_right > x and bottom > y]
+        found.sort()
+        return found
+
+
+BROAD_PHASES = ('grid', 'sweep', 'brute')
+
+
+def make_broad_phase(name, cell_size):
+    """Broad phase for ``Game``; cell_size only matters to the grid."""
+    if name == 'grid':
+        return SpatialGrid(cell_size)
+    if name == 'sweep':
+        return SweepAndPrune()
+    if name == 'brute':
+        return BruteForce()
+    raise ValueError(f"unknown broad phase {name!r}; expected one of "
+                     f"{BROAD_PHASES}")
@@ -0,0 +1,420 @@
+"""Live spectating: stream per-tick game state to viewers over TCP.
+
+The game thread encodes each tick once; an asyncio server on its own
+thread fans the same bytes out to every viewer. Messages are framed as
+``u32 length`` + body (little endian)::
+
+    body     : u8 type ('K' keyframe / 'D' delta), u32 keyframe, u32 tick,
+               i64 score, u32 wave, player (i16 x y health max_health
+               shield max_shield, u8 weapon_level), then per table
+               (enemies, power-ups):
+    keyframe : u32 n + n full records sorted by id
+    delta    : u32 n + n u16 removed keyframe rows,
+               u32 n + n (u16 row, i16 x, i16 y) moved rows,
+               enemies only: u32 n + n (u16 row, i16 health),
+               u32 n + n full records for entities new since the keyframe
+
+Enemy records are (u32 id, i16 x, i16 y, u8 kind, i16 health), power-ups
+(u32 id, i16 x, i16 y, u8 kind); positions are rounded to pixels.
+
+Every delta is relative to a keyframe, never to the previous delta, so
+a viewer can miss any number of them. A new viewer gets the latest
+keyframe first and only receives deltas once it has acknowledged that
+keyframe (``u8 'A', u32 keyframe``). A viewer whose socket is backed up
+skips every message, keyframes included, until it drains, and then gets
+the latest keyframe if it missed one.
+"""
+import argparse
+import asyncio
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+KEYFRAME = ord('K')
+DELTA = ord('D')
+ACK = ord('A')
+
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<BII')
+_SCALARS = struct.Struct('<qIhhhhhhB')
+_COUNT = struct.Struct('<I')
+_ACK = struct.Struct('<BI')
+
+ENEMY_RECORD = np.dtype([('id', '<u4'), ('x', '<i2'), ('y', '<i2'),
+                         ('kind', 'u1'), ('health', '<i2')])
+POWERUP_RECORD = np.dtype([('id', '<u4'), ('x', '<i2'), ('y', '<i2'),
+                           ('kind', 'u1')])
+_ROW = np.dtype('<u2')
+_MOVE = np.dtype([('row', '<u2'), ('x', '<i2'), ('y', '<i2')])
+_HEALTH = np.dtype([('row', '<u2'), ('health', '<i2')])
+
+# Keyframe rows are addressed with u16
+MAX_ROWS = 0xFFFF
+
+
+def _pixels(values):
+    return np.clip(np.rint(values), -0x8000, 0x7FFF)
+
+
+def capture_tables(game):
+    """Enemy and power-up records for the current tick, sorted by id."""
+    enemies = game.enemies
+    n = enemies.count
+    enemy = np.empty(n, dtype=ENEMY_RECORD)
+    enemy['id'] = enemies.id[:n]
+    enemy['x'] = _pixels(enemies.x[:n])
+    enemy['y'] = _pixels(enemies.y[:n])
+    enemy['kind'] = enemies.sprite[:n]
+    enemy['health'] = enemies.health[:n]
+    powerups = game.powerups
+    n = powerups.count
+    powerup = np.empty(n, dtype=POWERUP_RECORD)
+    powerup['id'] = powerups.id[:n]
+    powerup['x'] = _pixels(powerups.x[:n])
+    powerup['y'] = _pixels(powerups.y[:n])
+    powerup['kind'] = powerups.sprite[:n]
+    return (enemy[np.argsort(enemy['id'], kind='stable')],
+            powerup[np.argsort(powerup['id'], kind='stable')])
+
+
+def _scalars(game):
+    player = game.player
+    return _SCALARS.pack(game.score, game.wave, *(
+        int(value) for value in _pixels([
+            player.x, player.y, player.health, player.max_health,
+            player.shield, player.max_shield])), player.weapon_level)
+
+
+def _diff(keyframe, current, health):
+    """Delta payload of ``current`` against ``keyframe`` (both by id)."""
+    ids = keyframe['id']
+    if len(ids):
+        rows = np.searchsorted(ids, current['id'])
+        clipped = np.minimum(rows, len(ids) - 1)
+        known = (ids[clipped] == current['id']) & (rows < len(ids))
+        # A rewound game hands out ids again, possibly to another kind
+        known &= keyframe['kind'][clipped] == current['kind']
+    else:
+        rows = np.zeros(len(current), dtype=np.intp)
+        known = np.zeros(len(current), dtype=bool)
+    rows = rows[known]
+    now = current[known]
+    then = keyframe[rows]
+    removed = np.ones(len(ids), dtype=bool)
+    removed[rows] = False
+    parts = [np.flatnonzero(removed).astype(_ROW)]
+    moved = (then['x'] != now['x']) | (then['y'] != now['y'])
+    move = np.empty(int(moved.sum()), dtype=_MOVE)
+    move['row'] = rows[moved]
+    move['x'] = now['x'][moved]
+    move['y'] = now['y'][moved]
+    parts.append(move)
+    if health:
+        hurt = then['health'] != now['health']
+        change = np.empty(int(hurt.sum()), dtype=_HEALTH)
+        change['row'] = rows[hurt]
+        change['health'] = now['health'][hurt]
+        parts.append(change)
+    parts.append(current[~known])
+    return b''.join(_COUNT.pack(len(part)) + part.tobytes() for part in parts)
+
+
+class StateEncoder:
+    """Turns game ticks into keyframe/delta messages.
+
+    A keyframe is taken every ``keyframe_interval`` ticks, and early when a
+    delta has grown to ``rekey_ratio`` of the last keyframe's size. With
+    only a handful of entities the per-table counts make a delta bigger
+    than a keyframe, so those ticks are all keyframes.
+    """
+
+    def __init__(self, keyframe_interval=60, rekey_ratio=0.8):
+        self.keyframe_interval = keyframe_interval
+        self.rekey_ratio = rekey_ratio
+        self.keyframe = 0
+        self.tick = 0
+        self._base = None
+        self._base_size = 0
+        self._since = 0
+
+    def encode(self, game):
+        """Returns (type, keyframe number, message body) for this tick."""
+        self.tick += 1
+        tables = capture_tables(game)
+        scalars = _scalars(game)
+        if (self._base is not None and self._since < self.keyframe_interval
+                and all(len(table) <= MAX_ROWS for table in self._base)):
+            self._since += 1
+            body = (_HEADER.pack(DELTA, self.keyframe, self.tick) + scalars
+                    + _diff(self._base[0], tables[0], True)
+                    + _diff(self._base[1], tables[1], False))
+            if len(body) < self._base_size * self.rekey_ratio:
+                return DELTA, self.keyframe, body
+        self.keyframe += 1
+        self._base = tables
+        self._since = 0
+        body = (_HEADER.pack(KEYFRAME, self.keyframe, self.tick) + scalars
+                + b''.join(_COUNT.pack(len(table)) + table.tobytes()
+                           for table in tables))
+        self._base_size = len(body)
+        return KEYFRAME, self.keyframe, body
+
+
+class SpectatorState:
+    """What a viewer knows: the last tick it decoded."""
+
+    def __init__(self):
+        self.keyframe = 0
+        self.tick = 0
+        self.score = 0
+        self.wave = 0
+        self.player = None
+        self.enemies = np.empty(0, dtype=ENEMY_RECORD)
+        self.powerups = np.empty(0, dtype=POWERUP_RECORD)
+        self._base = None
+
+    def apply(self, body):
+        """Decode one message body; returns its type."""
+        kind, keyframe, self.tick = _HEADER.unpack_from(body)
+        pos = _HEADER.size
+        values = _SCALARS.unpack_from(body, pos)
+        pos += _SCALARS.size
+        self.score, self.wave = values[:2]
+        self.player = dict(zip(('x', 'y', 'health', 'max_health', 'shield',
+                                'max_shield', 'weapon_level'), values[2:]))
+        if kind == KEYFRAME:
+            tables = []
+            for dtype in (ENEMY_RECORD, POWERUP_RECORD):
+                table, pos = self._read(body, pos, dtype)
+                tables.append(table)
+            self._base = tables
+            self.keyframe = keyframe
+        elif keyframe != self.keyframe:
+            raise ValueError(f"delta against keyframe {keyframe}, "
+                             f"have {self.keyframe}")
+        else:
+            tables = []
+            for base, dtype in zip(self._base, (ENEMY_RECORD, POWERUP_RECORD)):
+                table, pos = self._patch(body, pos, base, dtype)
+                tables.append(table)
+        self.enemies, self.powerups = tables
+        return kind
+
+    @staticmethod
+    def _read(body, pos, dtype):
+        count, = _COUNT.unpack_from(body, pos)
+        pos += _COUNT.size
+        end = pos + count * dtype.itemsize
+        return np.frombuffer(body[pos:end], dtype=dtype).copy(), end
+
+    def _patch(self, body, pos, base, dtype):
+        removed, pos = self._read(body, pos, _ROW)
+        moved, pos = self._read(body, pos, _MOVE)
+        table = base.copy()
+        table['x'][moved['row']] = moved['x']
+        table['y'][moved['row']] = moved['y']
+        if 'health' in dtype.names:
+            hurt, pos = self._read(body, pos, _HEALTH)
+            table['health'][hurt['row']] = hurt['health']
+        added, pos = self._read(body, pos, dtype)
+        keep = np.ones(len(table), dtype=bool)
+        keep[removed] = False
+        table = np.concatenate([table[keep], added])
+        return table[np.argsort(table['id'], kind='stable')], pos
+
+
+class _Viewer:
+    def __init__(self, writer):
+        self.writer = writer
+        self.acked = 0
+        # Set when a keyframe was skipped; the latest one is sent on drain
+        self.stale = False
+
+
+class SpectatorServer:
+    """Asyncio TCP server on a daemon thread; ``publish(game)`` once per tick
+    from the game thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, keyframe_interval=60,
+                 max_backlog=256 * 1024, window=600):
+        self.host = host
+        self.port = port
+        self.max_backlog = max_backlog
+        self.encoder = StateEncoder(keyframe_interval)
+        self.viewers = set()
+        self.keyframes = 0
+        self.deltas = 0
+        self.encoded_bytes = 0
+        self.skipped = 0
+        self.encode_times = deque(maxlen=window)
+        self.tick_bytes = deque(maxlen=window)
+        self._keyframe = None
+        self._loop = None
+        self._server = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name='spectators',
+                                        daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def publish(self, game):
+        """Encode this tick and queue it for the viewers; returns the
+        message type."""
+        start = time.perf_counter()
+        kind, keyframe, body = self.encoder.encode(game)
+        message = _LENGTH.pack(len(body)) + body
+        self.encode_times.append(time.perf_counter() - start)
+        self.tick_bytes.append(len(message))
+        self.encoded_bytes += len(message)
+        if kind == KEYFRAME:
+            self.keyframes += 1
+        else:
+            self.deltas += 1
+        self._loop.call_soon_threadsafe(self._broadcast, kind, keyframe,
+                                        message)
+        return kind
+
+    def close(self, timeout=5.0):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+
+    def _serve(self):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._server = loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            # Closing a connection ends its handler's read
+            for viewer in list(self.viewers):
+                viewer.writer.close()
+            tasks = asyncio.all_tasks(loop)
+            loop.run_until_complete(asyncio.gather(*tasks,
+                                                   return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader, writer):
+        viewer = _Viewer(writer)
+        self.viewers.add(viewer)
+        if self._keyframe is not None:
+            writer.write(self._keyframe)
+        try:
+            while True:
+                kind, keyframe = _ACK.unpack(
+                    await reader.readexactly(_ACK.size))
+                if kind == ACK:
+                    viewer.acked = keyframe
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+
+    def _broadcast(self, kind, keyframe, message):
+        if kind == KEYFRAME:
+            self._keyframe = message
+        for viewer in self.viewers:
+            if (viewer.writer.transport.get_write_buffer_size()
+                    >= self.max_backlog):
+                viewer.stale = viewer.stale or kind == KEYFRAME
+                self.skipped += 1
+            elif kind == KEYFRAME or viewer.stale:
+                viewer.writer.write(self._keyframe)
+                viewer.stale = False
+            elif viewer.acked == keyframe:
+                viewer.writer.write(message)
+            else:
+                self.skipped += 1
+
+    def stats(self):
+        times = sorted(self.encode_times)
+        sizes = list(self.tick_bytes)
+        return {
+            'viewers': len(self.viewers),
+            'keyframes': self.keyframes,
+            'deltas': self.deltas,
+            'encoded_kb': self.encoded_bytes / 1024,
+            'bytes_per_tick': sum(sizes) / len(sizes) if sizes else 0.0,
+            'encode_ms': sum(times) / len(times) * 1000 if times else 0.0,
+            'encode_p99_ms': times[int(len(times) * 0.99)] * 1000 if times else 0.0,
+            'skipped': self.skipped,
+        }
+
+
+class SpectatorClient:
+    """Minimal viewer: decodes the stream into ``state`` and acknowledges
+    keyframes."""
+
+    def __init__(self):
+        self.state = SpectatorState()
+        self.messages = 0
+        self.bytes = 0
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, host, port):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+
+    async def receive(self):
+        """Read and apply one message; returns its type."""
+        length, = _LENGTH.unpack(await self._reader.readexactly(_LENGTH.size))
+        body = await self._reader.readexactly(length)
+        self.messages += 1
+        self.bytes += _LENGTH.size + length
+        kind = self.state.apply(body)
+        if kind == KEYFRAME:
+            self._writer.write(_ACK.pack(ACK, self.state.keyframe))
+            await self._writer.drain()
+        return kind
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _watch(host, port):
+    client = SpectatorClient()
+    await client.connect(host, port)
+    last = 0.0
+    try:
+        while True:
+            await client.receive()
+            now = time.monotonic()
+            if now - last >= 1.0:
+                last = now
+                state = client.state
+                print(f"tick {state.tick}: score {state.score} wave "
+                      f"{state.wave} enemies {len(state.enemies)} "
+                      f"power-ups {len(state.powerups)} "
+                      f"({client.bytes / 1024:.0f} KB received)")
+    except asyncio.IncompleteReadError:
+        print("session ended")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a game started "
+                                                 "with --spectate")
+    parser.add_argument("address", help="HOST:PORT")
+    args = parser.parse_args()
+    host, _, port = args.address.rpartition(':')
+    try:
+        asyncio.run(_watch(host or '127.0.0.1', int(port)))
+    except (ConnectionError, KeyboardInterrupt) as error:
+        sys.exit(str(error) or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""LRU cache of pre-rendered sprite surfaces."""
+from collections import OrderedDict
+
+import pygame
+
+
+class SpriteCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, render, *args):
+        """Return the surface for ``key``, calling ``render(*args)`` on a miss."""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = render(*args)
+        if pygame.display.get_surface() is not None:
+            surface = (surface.convert_alpha()
+                       if surface.get_flags() & pygame.SRCALPHA
+                       else surface.convert())
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
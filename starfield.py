@@ -0,0 +1,138 @@
+"""Scrolling parallax starfield stored as NumPy arrays.
+
+Each layer is ``(count, min_speed, max_speed)``. Stars faster than one
+pixel per frame are drawn 2x2, the rest 1x1. Small layers keep a speed per
+star and are drawn with a handful of vectorized writes into the surface's
+pixel array. Layers with more than ``baked_above`` stars are rendered once
+onto a transparent tile that scrolls at the layer's mean speed, so their
+per-frame cost does not depend on how many stars they hold.
+"""
+import copy
+
+import numpy as np
+import pygame
+
+
+class ScrollingLayer:
+    def __init__(self, count, speed):
+        self.count = count
+        self.speed = speed
+        self.x = np.zeros(count, dtype=np.intp)
+        self.y = np.zeros(count, dtype=np.intp)
+        self.tile = None
+
+
+class Starfield:
+    def __init__(self, width, height, layers, baked_above=4096):
+        self.width = width
+        self.height = height
+        self.layers = list(layers)
+        self.baked_above = baked_above
+        count = sum(layer[0] for layer in self.layers
+                    if layer[0] <= baked_above)
+        self.x = np.zeros(count, dtype=np.float64)
+        self.y = np.zeros(count, dtype=np.float64)
+        self.speed = np.zeros(count, dtype=np.float64)
+        self._wrapped = np.zeros(count, dtype=bool)
+        self.scrolling = [ScrollingLayer(count, (low + high) / 2)
+                          for count, low, high in self.layers
+                          if count > baked_above]
+        # Scroll position of each scrolling layer; replaced, never modified,
+        # so snapshots can share it
+        self.offsets = [0.0] * len(self.scrolling)
+        self.rng = None
+
+    def __len__(self):
+        return len(self.x) + sum(layer.count for layer in self.scrolling)
+
+    def scatter(self, rng):
+        self.rng = rng
+        count = len(self.x)
+        self.x[:] = rng.integers(0, self.width, count, endpoint=True)
+        self.y[:] = rng.integers(0, self.height, count, endpoint=True)
+        start = 0
+        for count, low, high in self.layers:
+            if count <= self.baked_above:
+                self.speed[start:start + count] = rng.uniform(low, high, count)
+                start += count
+        for layer in self.scrolling:
+            layer.x[:] = rng.integers(0, self.width, layer.count)
+            layer.y[:] = rng.integers(0, self.height, layer.count)
+            layer.tile = None
+        self.offsets = [0.0] * len(self.scrolling)
+
+    def update(self):
+        self.y += self.speed
+        wrapped = np.greater(self.y, self.height, out=self._wrapped)
+        count = np.count_nonzero(wrapped)
+        if count:
+            self.y[wrapped] = 0
+            self.x[wrapped] = self.rng.integers(0, self.width, count,
+                                                endpoint=True)
+        self.offsets = [(offset + layer.speed) % self.height
+                        for offset, layer in zip(self.offsets, self.scrolling)]
+
+    def snapshot(self):
+        """Copy of the moving state, safe to draw from another thread while
+        this starfield keeps updating. Scrolling layers (and their
+        pre-rendered tiles) are shared."""
+        frozen = copy.copy(self)
+        frozen.x = self.x.copy()
+        frozen.y = self.y.copy()
+        return frozen
+
+    def draw(self, surface, color, rects=None, alpha=1.0):
+        # alpha < 1 draws the stars part of the way back towards where they
+        # were on the previous update
+        lag = 1.0 - alpha
+        for layer, offset in zip(self.scrolling, self.offsets):
+            self._draw_scrolling(surface, color, layer, offset, rects, lag)
+        if not len(self.x):
+            return
+        width, height = surface.get_size()
+        xs = self.x.astype(np.intp)
+        if lag > 0:
+            ys = np.floor(self.y - self.speed * lag).astype(np.intp)
+        else:
+            ys = self.y.astype(np.intp)
+        big = self.speed > 1
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            mapped = surface.map_rgb(color)
+            for dx, dy, mask in ((0, 0, None), (1, 0, big), (0, 1, big), (1, 1, big)):
+                px = xs + dx if mask is None else xs[mask] + dx
+                py = ys + dy if mask is None else ys[mask] + dy
+                inside = (px < width) & (py < height) & (py >= 0)
+                pixels[px[inside], py[inside]] = mapped
+        finally:
+            del pixels
+        if rects is not None:
+            sizes = np.where(big, 2, 1).tolist()
+            rects.extend(pygame.Rect(x, y, size, size)
+                         for x, y, size in zip(xs.tolist(), ys.tolist(), sizes))
+
+    def _draw_scrolling(self, surface, color, layer, offset, rects, lag=0.0):
+        if layer.tile is None:
+            layer.tile = self._render_tile(color, layer)
+        offset = int((offset - layer.speed * lag) % self.height)
+        surface.blit(layer.tile, (0, offset))
+        surface.blit(layer.tile, (0, offset - self.height))
+        if rects is not None:
+            rects.append(surface.get_rect())
+
+    def _render_tile(self, color, layer):
+        # Colorkeyed black; the tile wraps vertically so two blits cover the
+        # screen at any scroll offset
+        tile = pygame.Surface((self.width, self.height))
+        tile.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        size = 2 if layer.speed > 1 else 1
+        pixels = pygame.surfarray.pixels2d(tile)
+        try:
+            mapped = tile.map_rgb(color)
+            for dx in range(size):
+                for dy in range(size):
+                    pixels[(layer.x + dx) % self.width,
+                           (layer.y + dy) % self.height] = mapped
+        finally:
+            del pixels
+        return tile.convert() if pygame.display.get_surface() else tile